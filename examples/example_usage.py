@@ -6,24 +6,46 @@ to convert sheet music images to MIDI files.
 """
 
 import os
+from functools import lru_cache
+import cv2
 from sheetmusic2midi import SheetMusicConverter
 
 
+# Set to a pixel height (e.g. 128) to downscale inputs before processing.
+# Small heights speed up every stage but can lose detail on dense scores.
+PREPROCESS_RESIZE = None
+
+
+@lru_cache(maxsize=None)
+def _get_converter(tempo=120, clef='treble', preprocess_resize=PREPROCESS_RESIZE):
+    """Return a shared converter for the given settings, built on first use"""
+    return SheetMusicConverter(tempo=tempo, clef=clef, preprocess_resize=preprocess_resize)
+
+
+@lru_cache(maxsize=None)
+def _load_image(path):
+    """Decode an example image once and share it; returns None if it is missing"""
+    if not os.path.exists(path):
+        return None
+    return cv2.imread(path)
+
+
 def simple_conversion_example():
     """Example: Convert a single sheet music image to MIDI"""
     print("Example 1: Simple Conversion")
     print("-" * 50)
 
     # Create converter with default settings
-    converter = SheetMusicConverter(tempo=120, clef='treble')
+    converter = _get_converter(tempo=120, clef='treble')
 
     # Convert image to MIDI
     input_image = "examples/sample_sheet_music.png"
     output_midi = "output/sample_output.mid"
 
-    if os.path.exists(input_image):
+    image = _load_image(input_image)
+    if image is not None:
         try:
-            converter.convert(input_image, output_midi)
+            converter.convert_ndarray(image, output_midi)
             print(f"Success! MIDI file saved to: {output_midi}")
         except Exception as e:
             print(f"Error: {e}")
@@ -40,14 +62,15 @@ def custom_tempo_example():
     print("-" * 50)
 
     # Create converter with custom tempo (faster)
-    converter = SheetMusicConverter(tempo=140, clef='treble')
+    converter = _get_converter(tempo=140, clef='treble')
 
     input_image = "examples/sample_sheet_music.png"
     output_midi = "output/sample_fast.mid"
 
-    if os.path.exists(input_image):
+    image = _load_image(input_image)
+    if image is not None:
         try:
-            converter.convert(input_image, output_midi)
+            converter.convert_ndarray(image, output_midi)
             print(f"Success! Fast tempo MIDI saved to: {output_midi}")
         except Exception as e:
             print(f"Error: {e}")
@@ -63,14 +86,15 @@ def bass_clef_example():
     print("-" * 50)
 
     # Create converter for bass clef
-    converter = SheetMusicConverter(tempo=100, clef='bass')
+    converter = _get_converter(tempo=100, clef='bass')
 
     input_image = "examples/bass_clef_sample.png"
     output_midi = "output/bass_output.mid"
 
-    if os.path.exists(input_image):
+    image = _load_image(input_image)
+    if image is not None:
         try:
-            converter.convert(input_image, output_midi)
+            converter.convert_ndarray(image, output_midi)
             print(f"Success! Bass clef MIDI saved to: {output_midi}")
         except Exception as e:
             print(f"Error: {e}")
@@ -81,13 +105,18 @@ def bass_clef_example():
     print()
 
 
-def batch_conversion_example():
-    """Example: Batch convert multiple images"""
+def batch_conversion_example(max_workers=None):
+    """
+    Example: Batch convert multiple images in parallel
+
+    Args:
+        max_workers: Number of worker processes (default: os.cpu_count())
+    """
     print("Example 4: Batch Conversion")
     print("-" * 50)
 
     # Create converter
-    converter = SheetMusicConverter(tempo=120, clef='treble')
+    converter = _get_converter(tempo=120, clef='treble')
 
     input_dir = "examples/"
     output_dir = "output/batch/"
@@ -96,7 +125,8 @@ def batch_conversion_example():
     os.makedirs(output_dir, exist_ok=True)
 
     try:
-        output_files = converter.batch_convert(input_dir, output_dir)
+        # Each image is independent, so they are converted in a process pool
+        output_files = converter.batch_convert(input_dir, output_dir, jobs=max_workers)
         print(f"Converted {len(output_files)} file(s)")
         for file in output_files:
             print(f"  - {file}")
@@ -111,15 +141,16 @@ def debug_mode_example():
     print("Example 5: Debug Mode (Save Intermediate Images)")
     print("-" * 50)
 
-    converter = SheetMusicConverter(tempo=120, clef='treble')
+    converter = _get_converter(tempo=120, clef='treble')
 
     input_image = "examples/sample_sheet_music.png"
     output_midi = "output/debug_output.mid"
 
-    if os.path.exists(input_image):
+    image = _load_image(input_image)
+    if image is not None:
         try:
             # This will save intermediate processing steps
-            converter.convert(input_image, output_midi, save_intermediate=True)
+            converter.convert_ndarray(image, output_midi, save_intermediate=True)
             print(f"Success! Check output directory for intermediate images:")
             print(f"  - {output_midi[:-4]}_1_preprocessed.png")
             print(f"  - {output_midi[:-4]}_2_no_staff.png")
@@ -136,14 +167,15 @@ def get_processing_info_example():
     print("Example 6: Get Processing Information")
     print("-" * 50)
 
-    converter = SheetMusicConverter(tempo=120, clef='treble')
+    converter = _get_converter(tempo=120, clef='treble')
 
     input_image = "examples/sample_sheet_music.png"
     output_midi = "output/info_output.mid"
 
-    if os.path.exists(input_image):
+    image = _load_image(input_image)
+    if image is not None:
         try:
-            converter.convert(input_image, output_midi)
+            converter.convert_ndarray(image, output_midi)
 
             # Get detailed processing information
             info = converter.get_processing_info()
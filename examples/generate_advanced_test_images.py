@@ -6,23 +6,63 @@ This creates sheet music images with the newly supported features.
 
 import cv2
 import numpy as np
+from functools import lru_cache
 
 
 def create_staff_lines(image, y_start, line_spacing, line_thickness, x_start, x_end):
     """Draw 5 horizontal staff lines"""
-    for i in range(5):
-        y = y_start + i * line_spacing
-        cv2.line(image, (x_start, y), (x_end, y), 0, line_thickness)
+    # Draw one line into a scratch strip to get cv2.line's exact shape (its
+    # round caps make the middle rows longer), then write each row of that
+    # shape for all five lines with one slice assignment
+    pad = line_thickness + 1
+    length = x_end - x_start
+    strip = np.full((2 * pad + 1, length + 2 * pad + 1), 255, dtype=np.uint8)
+    cv2.line(strip, (pad, pad), (pad + length, pad), 0, line_thickness)
+
+    ys = y_start + np.arange(5) * line_spacing
+    for offset, strip_row in enumerate(strip, -pad):
+        cols = np.flatnonzero(strip_row == 0)
+        if cols.size == 0:
+            continue
+        rows = ys + offset
+        rows = rows[(rows >= 0) & (rows < image.shape[0])]
+        left = max(x_start - pad + cols[0], 0)
+        right = min(x_start - pad + cols[-1] + 1, image.shape[1])
+        image[rows, left:right] = 0
+
+
+def _blit(image, sprite, top, left):
+    """Darken image with a sprite whose top-left corner is at (left, top), clipped to the image"""
+    y0, x0 = top, left
+    top, left = max(y0, 0), max(x0, 0)
+    bottom = min(y0 + sprite.shape[0], image.shape[0])
+    right = min(x0 + sprite.shape[1], image.shape[1])
+    if top >= bottom or left >= right:
+        return
+    region = image[top:bottom, left:right]
+    np.minimum(region, sprite[top - y0:bottom - y0, left - x0:right - x0], out=region)
+
+
+def _paste(image, sprite, x, y):
+    """Darken image with a sprite centered at (x, y)"""
+    _blit(image, sprite, y - sprite.shape[0] // 2, x - sprite.shape[1] // 2)
+
+
+@lru_cache(maxsize=None)
+def _note_stamp(radius, filled):
+    """Render a note head once; every note of the same size reuses the stamp"""
+    half = radius + 2
+    stamp = np.full((2 * half + 1, 2 * half + 1), 255, dtype=np.uint8)
+    axes = (radius, int(radius * 0.7))
+    angle = -20
+    cv2.ellipse(stamp, (half, half), axes, angle, 0, 360, 0, -1 if filled else 2)
+    stamp.flags.writeable = False
+    return stamp
 
 
 def draw_note_head(image, x, y, radius, filled=True):
     """Draw a note head (oval shape)"""
-    axes = (radius, int(radius * 0.7))
-    angle = -20
-    if filled:
-        cv2.ellipse(image, (x, y), axes, angle, 0, 360, 0, -1)
-    else:
-        cv2.ellipse(image, (x, y), axes, angle, 0, 360, 0, 2)
+    _paste(image, _note_stamp(radius, filled), x, y)
 
 
 def draw_note_stem(image, x, y, length, thickness=2):
@@ -30,8 +70,8 @@ def draw_note_stem(image, x, y, length, thickness=2):
     cv2.line(image, (x, y), (x, y - length), 0, thickness)
 
 
-def draw_sharp(image, x, y, size=10):
-    """Draw a sharp symbol (#)"""
+def _render_sharp(image, x, y, size):
+    """Rasterize a sharp symbol (#)"""
     # Two vertical lines
     cv2.line(image, (x-3, y-size), (x-3, y+size), 0, 2)
     cv2.line(image, (x+3, y-size), (x+3, y+size), 0, 2)
@@ -40,16 +80,16 @@ def draw_sharp(image, x, y, size=10):
     cv2.line(image, (x-5, y+3), (x+5, y+4), 0, 2)
 
 
-def draw_flat(image, x, y, size=12):
-    """Draw a flat symbol (b)"""
+def _render_flat(image, x, y, size):
+    """Rasterize a flat symbol (b)"""
     # Vertical line
     cv2.line(image, (x, y-size), (x, y+size//2), 0, 2)
     # Rounded bottom part
     cv2.ellipse(image, (x+3, y+2), (4, 5), 0, -90, 180, 0, 2)
 
 
-def draw_natural(image, x, y, size=10):
-    """Draw a natural symbol"""
+def _render_natural(image, x, y, size):
+    """Rasterize a natural symbol"""
     # Two vertical lines
     cv2.line(image, (x-3, y-size), (x-3, y+2), 0, 2)
     cv2.line(image, (x+3, y-2), (x+3, y+size), 0, 2)
@@ -58,28 +98,110 @@ def draw_natural(image, x, y, size=10):
     cv2.line(image, (x-3, y+2), (x+3, y+2), 0, 2)
 
 
+# Simplified quarter rest (zigzag shape), relative to the rest's (x, y)
+_QREST_OFFSETS = np.array([
+    [0, -15],
+    [5, -10],
+    [0, -5],
+    [5, 0],
+    [0, 5],
+    [5, 10]
+], np.int32)
+
+
+def _render_quarter_rest(image, x, y, size=None):
+    """Rasterize a quarter rest"""
+    points = (_QREST_OFFSETS + np.array([x, y], np.int32)).reshape(-1, 1, 2)
+    cv2.polylines(image, [points], False, 0, 2)
+
+
+def _render_half_rest(image, x, y, width):
+    """Rasterize a half rest (sits on line)"""
+    cv2.rectangle(image, (x-width//2, y), (x+width//2, y+4), 0, -1)
+
+
+def _render_whole_rest(image, x, y, width):
+    """Rasterize a whole rest (hangs from line)"""
+    cv2.rectangle(image, (x-width//2, y-4), (x+width//2, y), 0, -1)
+
+
+_GLYPH_RENDERERS = {
+    'sharp': _render_sharp,
+    'flat': _render_flat,
+    'natural': _render_natural,
+    'quarter_rest': _render_quarter_rest,
+    'half_rest': _render_half_rest,
+    'whole_rest': _render_whole_rest,
+}
+
+
+def _render_sprite(name, size):
+    """
+    Rasterize a glyph once into a sprite cropped to its bounding box
+
+    Returns:
+        Tuple of (sprite, anchor_y, anchor_x) where the anchor is the
+        glyph's (x, y) reference point inside the sprite
+    """
+    pad = 32
+    canvas = np.full((2 * pad + 1, 2 * pad + 1), 255, dtype=np.uint8)
+    _GLYPH_RENDERERS[name](canvas, pad, pad, size)
+    rows, cols = np.nonzero(canvas < 255)
+    top, left = rows.min(), cols.min()
+    sprite = canvas[top:rows.max() + 1, left:cols.max() + 1].copy()
+    sprite.flags.writeable = False
+    return sprite, pad - top, pad - left
+
+
+# Glyph sizes drawn by this script, rendered once at import; other sizes
+# are rendered on first use
+_SYMBOLS = {
+    (name, size): _render_sprite(name, size)
+    for name, size in [
+        ('sharp', 8), ('sharp', 10), ('flat', 10), ('flat', 12),
+        ('natural', 8), ('natural', 10), ('quarter_rest', None),
+        ('half_rest', 10), ('half_rest', 14), ('whole_rest', 10), ('whole_rest', 14),
+    ]
+}
+
+
+def _draw_glyph(image, name, x, y, size=None):
+    """Paste a pre-rendered glyph with its anchor at (x, y)"""
+    key = (name, size)
+    if key not in _SYMBOLS:
+        _SYMBOLS[key] = _render_sprite(name, size)
+    sprite, anchor_y, anchor_x = _SYMBOLS[key]
+    _blit(image, sprite, y - anchor_y, x - anchor_x)
+
+
+def draw_sharp(image, x, y, size=10):
+    """Draw a sharp symbol (#)"""
+    _draw_glyph(image, 'sharp', x, y, size)
+
+
+def draw_flat(image, x, y, size=12):
+    """Draw a flat symbol (b)"""
+    _draw_glyph(image, 'flat', x, y, size)
+
+
+def draw_natural(image, x, y, size=10):
+    """Draw a natural symbol"""
+    _draw_glyph(image, 'natural', x, y, size)
+
+
 def draw_quarter_rest(image, x, y):
     """Draw a quarter rest"""
-    # Simplified quarter rest (zigzag shape)
-    points = np.array([
-        [x, y-15],
-        [x+5, y-10],
-        [x, y-5],
-        [x+5, y],
-        [x, y+5],
-        [x+5, y+10]
-    ], np.int32)
-    cv2.polylines(image, [points], False, 0, 2)
+    _draw_glyph(image, 'quarter_rest', x, y)
 
 
 def draw_half_rest(image, x, y, width=10):
     """Draw a half rest (sits on line)"""
-    cv2.rectangle(image, (x-width//2, y), (x+width//2, y+4), 0, -1)
+    _draw_glyph(image, 'half_rest', x, y, width)
 
 
 def draw_whole_rest(image, x, y, width=10):
     """Draw a whole rest (hangs from line)"""
-    cv2.rectangle(image, (x-width//2, y-4), (x+width//2, y), 0, -1)
+    _draw_glyph(image, 'whole_rest', x, y, width)
 
 
 def draw_beam(image, x1, x2, y, thickness=3):
@@ -87,10 +209,26 @@ def draw_beam(image, x1, x2, y, thickness=3):
     cv2.line(image, (x1, y), (x2, y), 0, thickness)
 
 
-def create_sheet_with_accidentals(filename="sheet_with_accidentals.png"):
-    """Create sheet music with sharps, flats, and naturals"""
+def _white_canvas(height, width, image=None):
+    """Return a white height x width canvas, reusing a scratch buffer if one is given"""
+    if image is None:
+        return np.full((height, width), 255, dtype=np.uint8)
+    image = image[:height, :width]
+    image.fill(255)
+    return image
+
+
+def create_sheet_with_accidentals(filename="sheet_with_accidentals.png", image=None):
+    """
+    Create sheet music with sharps, flats, and naturals
+
+    Args:
+        filename: Output filename
+        image: Optional scratch buffer (at least 400 rows by the image width)
+               to draw into instead of allocating a new canvas
+    """
     width, height = 900, 400
-    image = np.ones((height, width), dtype=np.uint8) * 255
+    image = _white_canvas(height, width, image)
 
     # Staff parameters
     line_spacing = 20
@@ -108,21 +246,16 @@ def create_sheet_with_accidentals(filename="sheet_with_accidentals.png"):
     note_spacing = 90
     start_x = 150
 
-    # Draw notes with accidentals
-    notes = [
-        # (x_offset, y_pos, accidental_type, note_type)
-        (0, staff_y_start + 3 * line_spacing, 'sharp', 'quarter'),  # G#
-        (1, staff_y_start + 2.5 * line_spacing, None, 'quarter'),    # A
-        (2, staff_y_start + 2 * line_spacing, 'flat', 'quarter'),    # Bb
-        (3, staff_y_start + 1.5 * line_spacing, None, 'quarter'),    # C
-        (4, staff_y_start + line_spacing, 'natural', 'quarter'),     # D natural
-        (5, staff_y_start + 0.5 * line_spacing, 'sharp', 'quarter'), # E#
-    ]
+    # Draw notes with accidentals: (y offset in line spacings, accidental)
+    y_offsets = np.array([3, 2.5, 2, 1.5, 1, 0.5])  # G# A Bb C D-natural E#
+    accidentals = ['sharp', None, 'flat', None, 'natural', 'sharp']
 
-    for i, (x_offset, y_pos, accidental, note_type) in enumerate(notes):
-        x = start_x + x_offset * note_spacing
-        y = int(y_pos)
+    # Compute all note coordinates up front; the loop only issues draw calls
+    xs = start_x + np.arange(len(y_offsets)) * note_spacing
+    ys = (staff_y_start + y_offsets * line_spacing).astype(int)
+    stem_xs = xs + note_radius - 2
 
+    for x, y, stem_x, accidental in zip(xs.tolist(), ys.tolist(), stem_xs.tolist(), accidentals):
         # Draw accidental if present
         if accidental == 'sharp':
             draw_sharp(image, x - 25, y, size=8)
@@ -131,22 +264,26 @@ def create_sheet_with_accidentals(filename="sheet_with_accidentals.png"):
         elif accidental == 'natural':
             draw_natural(image, x - 25, y, size=8)
 
-        # Draw note head
+        # Draw note head and stem
         draw_note_head(image, x, y, note_radius, filled=True)
-
-        # Draw stem
-        stem_x = x + note_radius - 2
         draw_note_stem(image, stem_x, y, stem_length)
 
-    cv2.imwrite(filename, image)
+    cv2.imwrite(filename, image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
     print(f"Generated sheet music with accidentals: {filename}")
     return image
 
 
-def create_sheet_with_rests(filename="sheet_with_rests.png"):
-    """Create sheet music with various rest symbols"""
+def create_sheet_with_rests(filename="sheet_with_rests.png", image=None):
+    """
+    Create sheet music with various rest symbols
+
+    Args:
+        filename: Output filename
+        image: Optional scratch buffer (at least 400 rows by the image width)
+               to draw into instead of allocating a new canvas
+    """
     width, height = 900, 400
-    image = np.ones((height, width), dtype=np.uint8) * 255
+    image = _white_canvas(height, width, image)
 
     # Staff parameters
     line_spacing = 20
@@ -164,23 +301,17 @@ def create_sheet_with_rests(filename="sheet_with_rests.png"):
     start_x = 150
 
     # Pattern: note, rest, note, rest, etc.
-    elements = [
-        ('note', staff_y_start + 2 * line_spacing),  # Note
-        ('whole_rest', staff_y_start + line_spacing),  # Whole rest
-        ('note', staff_y_start + 3 * line_spacing),  # Note
-        ('half_rest', staff_y_start + 2 * line_spacing),  # Half rest
-        ('note', staff_y_start + line_spacing),  # Note
-        ('quarter_rest', staff_y_start + 2 * line_spacing),  # Quarter rest
-    ]
+    elem_types = ['note', 'whole_rest', 'note', 'half_rest', 'note', 'quarter_rest']
+    y_offsets = np.array([2, 1, 3, 2, 1, 2])
 
-    for i, (elem_type, y_pos) in enumerate(elements):
-        x = start_x + i * spacing
-        y = int(y_pos)
+    xs = start_x + np.arange(len(elem_types)) * spacing
+    ys = staff_y_start + y_offsets * line_spacing
+    stem_xs = xs + note_radius - 2
 
+    for elem_type, x, y, stem_x in zip(elem_types, xs.tolist(), ys.tolist(), stem_xs.tolist()):
         if elem_type == 'note':
             # Draw quarter note
             draw_note_head(image, x, y, note_radius, filled=True)
-            stem_x = x + note_radius - 2
             draw_note_stem(image, stem_x, y, stem_length)
 
         elif elem_type == 'whole_rest':
@@ -192,15 +323,22 @@ def create_sheet_with_rests(filename="sheet_with_rests.png"):
         elif elem_type == 'quarter_rest':
             draw_quarter_rest(image, x, y)
 
-    cv2.imwrite(filename, image)
+    cv2.imwrite(filename, image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
     print(f"Generated sheet music with rests: {filename}")
     return image
 
 
-def create_sheet_with_beamed_notes(filename="sheet_with_beamed_notes.png"):
-    """Create sheet music with beamed eighth notes"""
+def create_sheet_with_beamed_notes(filename="sheet_with_beamed_notes.png", image=None):
+    """
+    Create sheet music with beamed eighth notes
+
+    Args:
+        filename: Output filename
+        image: Optional scratch buffer (at least 400 rows by the image width)
+               to draw into instead of allocating a new canvas
+    """
     width, height = 900, 400
-    image = np.ones((height, width), dtype=np.uint8) * 255
+    image = _white_canvas(height, width, image)
 
     # Staff parameters
     line_spacing = 20
@@ -215,58 +353,41 @@ def create_sheet_with_beamed_notes(filename="sheet_with_beamed_notes.png"):
     note_radius = 12
     stem_length = 45
 
-    # First group of beamed notes
-    group1_notes = [
-        (180, staff_y_start + 2 * line_spacing),
-        (220, staff_y_start + 1.5 * line_spacing),
-        (260, staff_y_start + line_spacing),
-        (300, staff_y_start + 1.5 * line_spacing),
+    # Two beamed groups: note x positions and y offsets in line spacings
+    groups = [
+        (np.array([180, 220, 260, 300]), np.array([2, 1.5, 1, 1.5])),
+        (np.array([420, 460, 500]), np.array([3, 2.5, 2])),
     ]
 
-    # Draw first group
-    stem_tops = []
-    for x, y in group1_notes:
-        y = int(y)
-        draw_note_head(image, x, y, note_radius, filled=True)
-        stem_x = x + note_radius - 2
-        stem_top_y = y - stem_length
-        draw_note_stem(image, stem_x, y, stem_length)
-        stem_tops.append((stem_x, stem_top_y))
+    for xs, y_offsets in groups:
+        ys = (staff_y_start + y_offsets * line_spacing).astype(int)
+        stem_xs = xs + note_radius - 2
+        stem_tops = ys - stem_length
 
-    # Draw beam for first group
-    beam_y = int(np.mean([y for _, y in stem_tops]))
-    draw_beam(image, stem_tops[0][0], stem_tops[-1][0], beam_y, thickness=4)
-
-    # Second group of beamed notes
-    group2_notes = [
-        (420, staff_y_start + 3 * line_spacing),
-        (460, staff_y_start + 2.5 * line_spacing),
-        (500, staff_y_start + 2 * line_spacing),
-    ]
-
-    # Draw second group
-    stem_tops2 = []
-    for x, y in group2_notes:
-        y = int(y)
-        draw_note_head(image, x, y, note_radius, filled=True)
-        stem_x = x + note_radius - 2
-        stem_top_y = y - stem_length
-        draw_note_stem(image, stem_x, y, stem_length)
-        stem_tops2.append((stem_x, stem_top_y))
+        for x, y, stem_x in zip(xs.tolist(), ys.tolist(), stem_xs.tolist()):
+            draw_note_head(image, x, y, note_radius, filled=True)
+            draw_note_stem(image, stem_x, y, stem_length)
 
-    # Draw beam for second group
-    beam_y2 = int(np.mean([y for _, y in stem_tops2]))
-    draw_beam(image, stem_tops2[0][0], stem_tops2[-1][0], beam_y2, thickness=4)
+        # Draw beam across the group's stem tops
+        beam_y = int(stem_tops.sum()) // len(stem_tops)
+        draw_beam(image, int(stem_xs[0]), int(stem_xs[-1]), beam_y, thickness=4)
 
-    cv2.imwrite(filename, image)
+    cv2.imwrite(filename, image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
     print(f"Generated sheet music with beamed notes: {filename}")
     return image
 
 
-def create_comprehensive_test(filename="comprehensive_test.png"):
-    """Create a comprehensive test with all features"""
+def create_comprehensive_test(filename="comprehensive_test.png", image=None):
+    """
+    Create a comprehensive test with all features
+
+    Args:
+        filename: Output filename
+        image: Optional scratch buffer (at least 400 rows by the image width)
+               to draw into instead of allocating a new canvas
+    """
     width, height = 1200, 400
-    image = np.ones((height, width), dtype=np.uint8) * 255
+    image = _white_canvas(height, width, image)
 
     # Staff parameters
     line_spacing = 20
@@ -310,7 +431,7 @@ def create_comprehensive_test(filename="comprehensive_test.png"):
         beam_notes.append((stem_x, stem_top))
 
     # Draw beam
-    beam_y = int(np.mean([y for _, y in beam_notes]))
+    beam_y = sum(y for _, y in beam_notes) // len(beam_notes)
     draw_beam(image, beam_notes[0][0], beam_notes[-1][0], beam_y, thickness=4)
 
     x_pos += 200
@@ -325,7 +446,7 @@ def create_comprehensive_test(filename="comprehensive_test.png"):
     draw_note_head(image, x_pos, staff_y_start + line_spacing, note_radius, filled=True)
     draw_note_stem(image, x_pos + note_radius - 2, staff_y_start + line_spacing, stem_length)
 
-    cv2.imwrite(filename, image)
+    cv2.imwrite(filename, image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
     print(f"Generated comprehensive test image: {filename}")
     return image
 
@@ -334,10 +455,13 @@ def main():
     """Generate all advanced test images"""
     print("Generating advanced test images...\n")
 
-    create_sheet_with_accidentals("examples/sheet_with_accidentals.png")
-    create_sheet_with_rests("examples/sheet_with_rests.png")
-    create_sheet_with_beamed_notes("examples/sheet_with_beamed_notes.png")
-    create_comprehensive_test("examples/comprehensive_test.png")
+    # One scratch canvas, large enough for every image, reused by each generator
+    scratch = np.empty((400, 1200), dtype=np.uint8)
+
+    create_sheet_with_accidentals("examples/sheet_with_accidentals.png", image=scratch)
+    create_sheet_with_rests("examples/sheet_with_rests.png", image=scratch)
+    create_sheet_with_beamed_notes("examples/sheet_with_beamed_notes.png", image=scratch)
+    create_comprehensive_test("examples/comprehensive_test.png", image=scratch)
 
     print("\nAll advanced test images generated successfully!")
 
@@ -7,24 +7,60 @@ that can be used to test the sheetmusic2midi converter.
 
 import cv2
 import numpy as np
+from functools import lru_cache
 
 
 def create_staff_lines(image, y_start, line_spacing, line_thickness, x_start, x_end):
     """Draw 5 horizontal staff lines"""
-    for i in range(5):
-        y = y_start + i * line_spacing
-        cv2.line(image, (x_start, y), (x_end, y), 0, line_thickness)
+    # Draw one line into a scratch strip to get cv2.line's exact shape (its
+    # round caps make the middle rows longer), then write each row of that
+    # shape for all five lines with one slice assignment
+    pad = line_thickness + 1
+    length = x_end - x_start
+    strip = np.full((2 * pad + 1, length + 2 * pad + 1), 255, dtype=np.uint8)
+    cv2.line(strip, (pad, pad), (pad + length, pad), 0, line_thickness)
+
+    ys = y_start + np.arange(5) * line_spacing
+    for offset, strip_row in enumerate(strip, -pad):
+        cols = np.flatnonzero(strip_row == 0)
+        if cols.size == 0:
+            continue
+        rows = ys + offset
+        rows = rows[(rows >= 0) & (rows < image.shape[0])]
+        left = max(x_start - pad + cols[0], 0)
+        right = min(x_start - pad + cols[-1] + 1, image.shape[1])
+        image[rows, left:right] = 0
+
+
+def _paste(image, sprite, x, y):
+    """Darken image with a sprite centered at (x, y), clipped to the image bounds"""
+    half_h, half_w = sprite.shape[0] // 2, sprite.shape[1] // 2
+    y0, x0 = y - half_h, x - half_w
+    top, left = max(y0, 0), max(x0, 0)
+    bottom = min(y0 + sprite.shape[0], image.shape[0])
+    right = min(x0 + sprite.shape[1], image.shape[1])
+    if top >= bottom or left >= right:
+        return
+    region = image[top:bottom, left:right]
+    np.minimum(region, sprite[top - y0:bottom - y0, left - x0:right - x0], out=region)
+
+
+@lru_cache(maxsize=None)
+def _note_stamp(radius, filled):
+    """Render a note head once; every note of the same size reuses the stamp"""
+    half = radius + 2
+    stamp = np.full((2 * half + 1, 2 * half + 1), 255, dtype=np.uint8)
+    # Draw an ellipse for the note head
+    axes = (radius, int(radius * 0.7))  # Slightly oval
+    angle = -20  # Tilt the note head
+    cv2.ellipse(stamp, (half, half), axes, angle, 0, 360, 0, -1 if filled else 2)
+    stamp.flags.writeable = False
+    return stamp
 
 
 def draw_note_head(image, x, y, radius, filled=True):
     """Draw a note head (oval shape)"""
-    # Draw an ellipse for the note head
-    axes = (radius, int(radius * 0.7))  # Slightly oval
-    angle = -20  # Tilt the note head
-    if filled:
-        cv2.ellipse(image, (x, y), axes, angle, 0, 360, 0, -1)
-    else:
-        cv2.ellipse(image, (x, y), axes, angle, 0, 360, 0, 2)
+    _paste(image, _note_stamp(radius, filled), x, y)
 
 
 def draw_note_stem(image, x, y, length, thickness=2):
@@ -42,7 +78,7 @@ def create_simple_sheet_music(width=800, height=400, filename="sample_sheet_musi
         filename: Output filename
     """
     # Create white background
-    image = np.ones((height, width), dtype=np.uint8) * 255
+    image = np.full((height, width), 255, dtype=np.uint8)
 
     # Staff parameters - increased for better detection
     line_spacing = 20
@@ -65,38 +101,27 @@ def create_simple_sheet_music(width=800, height=400, filename="sample_sheet_musi
     # E4 (line 0), F4 (space 0.5), G4 (line 1), A4 (space 1.5),
     # B4 (line 2), C5 (space 2.5), D5 (line 3), E5 (space 3.5), F5 (line 4)
 
-    # For C major scale starting from C4 (below staff):
-    notes = [
-        # (x_offset, y_position, has_stem, filled)
-        # C4 - on ledger line below staff
-        (0, staff_y_start + 4 * line_spacing + line_spacing, True, True),
-        # D4 - below bottom line
-        (1, staff_y_start + 4 * line_spacing + line_spacing // 2, True, True),
-        # E4 - on bottom line
-        (2, staff_y_start + 4 * line_spacing, True, True),
-        # F4 - first space
-        (3, staff_y_start + 3.5 * line_spacing, True, True),
-        # G4 - second line
-        (4, staff_y_start + 3 * line_spacing, True, True),
-        # A4 - second space
-        (5, staff_y_start + 2.5 * line_spacing, True, True),
-        # B4 - third line
-        (6, staff_y_start + 2 * line_spacing, True, True),
-        # C5 - third space
-        (7, staff_y_start + 1.5 * line_spacing, True, True),
-    ]
-
-    for i, (x_offset, y_pos, has_stem, filled) in enumerate(notes):
-        x = start_x + x_offset * note_spacing
-        y = int(y_pos)
-
-        # Draw note head
-        draw_note_head(image, x, y, note_radius, filled)
-
-        # Draw stem if needed
-        if has_stem:
-            stem_x = x + note_radius - 2
-            draw_note_stem(image, stem_x, y, stem_length)
+    # For C major scale starting from C4 (below staff), positions are
+    # measured in line spacings down from the top staff line:
+    y_offsets = np.array([
+        5.0,  # C4 - on ledger line below staff
+        4.5,  # D4 - below bottom line
+        4.0,  # E4 - on bottom line
+        3.5,  # F4 - first space
+        3.0,  # G4 - second line
+        2.5,  # A4 - second space
+        2.0,  # B4 - third line
+        1.5,  # C5 - third space
+    ])
+
+    # Compute all note coordinates up front; the loop only issues draw calls
+    xs = start_x + np.arange(len(y_offsets)) * note_spacing
+    ys = (staff_y_start + y_offsets * line_spacing).astype(int)
+    stem_xs = xs + note_radius - 2
+
+    for x, y, stem_x in zip(xs.tolist(), ys.tolist(), stem_xs.tolist()):
+        draw_note_head(image, x, y, note_radius, filled=True)
+        draw_note_stem(image, stem_x, y, stem_length)
 
     # Draw a treble clef symbol (simplified version - just a vertical line with a curve)
     # In a real implementation, you'd draw a proper treble clef
@@ -109,7 +134,7 @@ def create_simple_sheet_music(width=800, height=400, filename="sample_sheet_musi
     cv2.circle(image, (clef_x, staff_y_start + 2 * line_spacing), 8, 0, 2)
 
     # Save image
-    cv2.imwrite(filename, image)
+    cv2.imwrite(filename, image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
     print(f"Generated test sheet music image: {filename}")
     print(f"  Size: {width}x{height} pixels")
     print(f"  Staff line spacing: {line_spacing} pixels")
@@ -122,7 +147,7 @@ def create_complex_sheet_music(filename="complex_sheet_music.png"):
     """Create a more complex sheet music example"""
     width = 1000
     height = 600
-    image = np.ones((height, width), dtype=np.uint8) * 255
+    image = np.full((height, width), 255, dtype=np.uint8)
 
     line_spacing = 15
     line_thickness = 2
@@ -170,7 +195,7 @@ def create_complex_sheet_music(filename="complex_sheet_music.png"):
         if has_stem:
             draw_note_stem(image, x + note_radius - 2, int(y), stem_length)
 
-    cv2.imwrite(filename, image)
+    cv2.imwrite(filename, image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
     print(f"\nGenerated complex test image: {filename}")
     print(f"  Contains: 2 staves with multiple notes")
 
@@ -29,11 +29,12 @@ setup(
         "opencv-python>=4.8.0",
         "numpy>=1.24.0",
         "mido>=1.3.0",
-        "music21>=9.1.0",
-        "Pillow>=10.0.0",
-        "scipy>=1.11.0",
-        "scikit-image>=0.21.0",
     ],
+    extras_require={
+        "pdf": ["PyMuPDF>=1.24.3"],
+        "score": ["music21>=9.1.0"],
+        "advanced": ["scikit-image>=0.21.0", "scipy>=1.11.0"],
+    },
     entry_points={
         "console_scripts": [
             "sheetmusic2midi=sheetmusic2midi.cli:main",
@@ -2,7 +2,19 @@
 SheetMusic2MIDI - Convert sheet music images to MIDI files
 """
 
+import os
+
+import cv2
+
 from .converter import SheetMusicConverter
+from .core.image_processor import default_preprocess
+
+# Make sure OpenCV's SIMD/IPP code paths are enabled. Its thread pool can be
+# sized via SHEETMUSIC2MIDI_CV_THREADS (e.g. 1 when running one conversion per
+# process); OpenCV treats 0 as "no threading" and a negative value as default.
+cv2.setUseOptimized(True)
+if os.environ.get("SHEETMUSIC2MIDI_CV_THREADS"):
+    cv2.setNumThreads(int(os.environ["SHEETMUSIC2MIDI_CV_THREADS"]))
 
 __version__ = "0.1.0"
-__all__ = ["SheetMusicConverter"]
+__all__ = ["SheetMusicConverter", "default_preprocess"]
@@ -1,8 +1,10 @@
 """Command-line interface for sheetmusic2midi"""
 
 import argparse
+import logging
 import os
 import sys
+import traceback
 from .converter import SheetMusicConverter
 
 
@@ -25,6 +27,9 @@ Examples:
   # Batch convert all images in a directory
   sheetmusic2midi --batch input_dir/ output_dir/
 
+  # Batch convert using 4 worker processes
+  sheetmusic2midi --batch input_dir/ output_dir/ --jobs 4
+
   # Combine multiple pages into one MIDI file
   sheetmusic2midi --multipage page1.png page2.png page3.png output.mid
 
@@ -33,6 +38,9 @@ Examples:
 
   # Save intermediate processing images
   sheetmusic2midi input.png output.mid --save-intermediate
+
+  # Cache preprocessing results so repeat conversions are faster
+  sheetmusic2midi input.png output.mid --cache-dir ~/.cache/sheetmusic2midi
         """
     )
 
@@ -67,6 +75,19 @@ Examples:
         help='Batch mode: convert all images in input directory'
     )
 
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of worker processes in batch mode. Default: 1'
+    )
+
+    parser.add_argument(
+        '--cache-dir',
+        default=None,
+        help='Directory for cached preprocessing results. Default: no caching'
+    )
+
     parser.add_argument(
         '--multipage',
         action='store_true',
@@ -79,6 +100,12 @@ Examples:
         help='Save intermediate processing images for debugging'
     )
 
+    parser.add_argument(
+        '--verbose', '-v',
+        action='store_true',
+        help='Print debug details such as detected staves, notes and deskew angles'
+    )
+
     parser.add_argument(
         '--version',
         action='version',
@@ -87,6 +114,9 @@ Examples:
 
     args = parser.parse_args()
 
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG, format='%(message)s')
+
     # Validate input - input is now a list
     input_paths = args.input
 
@@ -96,7 +126,11 @@ Examples:
         return 1
 
     # Create converter
-    converter = SheetMusicConverter(tempo=args.tempo, clef=args.clef)
+    converter = SheetMusicConverter(
+        tempo=args.tempo,
+        clef=args.clef,
+        cache_dir=args.cache_dir
+    )
 
     try:
         if args.batch:
@@ -110,7 +144,7 @@ Examples:
                 print("Error: In batch mode, input must be a directory", file=sys.stderr)
                 return 1
 
-            output_files = converter.batch_convert(input_dir, args.output)
+            output_files = converter.batch_convert(input_dir, args.output, jobs=args.jobs)
 
             if output_files:
                 print(f"\nSuccessfully converted {len(output_files)} file(s)")
@@ -193,7 +227,6 @@ Examples:
 
     except Exception as e:
         print(f"\nError during conversion: {e}", file=sys.stderr)
-        import traceback
         traceback.print_exc()
         return 1
 
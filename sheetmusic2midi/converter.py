@@ -1,11 +1,31 @@
 """Main converter class for sheet music to MIDI conversion"""
 
 import os
-from typing import Optional, List
+import queue
+import threading
+import warnings
+import cv2
+import numpy as np
+import operator
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Callable, Dict, Iterable, Iterator, Tuple, Union
 from .core.image_processor import ImageProcessor
-from .core.staff_detector import StaffDetector
+from .core.staff_detector import StaffDetector, Staff
 from .core.symbol_detector import SymbolDetector
 from .core.midi_generator import MidiGenerator
+from .utils.cache import PreprocessCache, image_cache_key
+from .utils.pdf_handler import PDFHandler
+
+
+# Reads symbol.symbol_type.value without a Python-level function call
+_symbol_type_value = operator.attrgetter('symbol_type.value')
+
+# End-of-input marker passed between multipage pipeline stages
+_PIPELINE_DONE = object()
+
+# Converter owned by a batch worker process, built once by _init_batch_worker
+_worker_converter: Optional['SheetMusicConverter'] = None
 
 
 class SheetMusicConverter:
@@ -19,19 +39,47 @@ class SheetMusicConverter:
     4. MIDI file generation
     """
 
-    def __init__(self, tempo: int = 120, clef: str = 'treble'):
+    # Preprocessing and staff removal results shared by converters created with
+    # share_results=True, keyed like the disk cache. While one conversion
+    # computes a key, concurrent conversions of the same image wait for it
+    # instead of repeating the work. Each entry holds two full-page images,
+    # so only the few most recent are kept.
+    _inflight: Dict[str, threading.Event] = {}
+    _results: "OrderedDict[str, tuple]" = OrderedDict()
+    _results_lock = threading.Lock()
+    _max_shared_results = 4
+
+    def __init__(self, tempo: int = 120, clef: str = 'treble',
+                 preprocess_resize: Optional[int] = None,
+                 cache_dir: Optional[str] = None, share_results: bool = False):
         """
         Initialize the sheet music converter
 
         Args:
             tempo: Tempo in BPM (beats per minute)
             clef: Musical clef type ('treble' or 'bass')
+            preprocess_resize: Optional fixed height in pixels that input images
+                             are downscaled to before processing (None = no resize)
+            cache_dir: Directory for an on-disk cache of preprocessing and staff
+                      removal results, reused when the same image is converted
+                      again (None disables caching)
+            share_results: Keep the last few preprocessing results in memory,
+                          shared with other converters in this process that
+                          also enable it, so converting the same image again
+                          (or concurrently) skips preprocessing
         """
         self.tempo = tempo
         self.clef = clef
+        self.preprocess_resize = preprocess_resize
+        self.cache_dir = cache_dir
+        self.share_results = share_results
+
+        self.preprocess_cache = None
+        if cache_dir is not None:
+            self.preprocess_cache = PreprocessCache(cache_dir)
 
         # Initialize processing components
-        self.image_processor = ImageProcessor()
+        self.image_processor = ImageProcessor(target_height=preprocess_resize)
         self.staff_detector = StaffDetector()
         self.symbol_detector = SymbolDetector(self.staff_detector)
         self.midi_generator = MidiGenerator(tempo=tempo)
@@ -40,6 +88,11 @@ class SheetMusicConverter:
         self.binary_image = None
         self.image_no_staff = None
 
+        # Background writer for intermediate images, started on first use
+        self._intermediate_queue: Optional[queue.Queue] = None
+        self._intermediate_writer: Optional[threading.Thread] = None
+        self._intermediate_lock = threading.Lock()
+
     def convert(self, input_image_path: str, output_midi_path: str,
                 save_intermediate: bool = False) -> str:
         """
@@ -55,28 +108,157 @@ class SheetMusicConverter:
         """
         print(f"Converting {input_image_path} to MIDI...")
 
+        if self.share_results:
+            binary_image, image_no_staff, staves, line_thickness = self._shared_preprocess(
+                self._cache_key(input_image_path), input_image_path
+            )
+        else:
+            # Only hash the input when the disk cache needs a key
+            key = None if self.preprocess_cache is None else self._cache_key(input_image_path)
+            binary_image, image_no_staff, staves, line_thickness = (
+                self._preprocess_and_remove_staves(key, input_image_path)
+            )
+        self.binary_image = binary_image
+        self.image_no_staff = image_no_staff
+        self.staff_detector.staves = staves
+        self.staff_detector.line_thickness = line_thickness
+
+        try:
+            return self._convert_binary_image(input_image_path, output_midi_path,
+                                              save_intermediate, staves=staves)
+        finally:
+            self._flush_intermediate_images()
+
+    def _cache_key(self, input_image_path: str) -> str:
+        """Cache key of an input image under this converter's preprocessing settings"""
+        processor = self.image_processor
+        return image_cache_key(input_image_path, self.preprocess_resize,
+                               processor.blur_kernel_size, processor.threshold_method)
+
+    def _shared_preprocess(self, key: str,
+                           input_image_path: str) -> Tuple[np.ndarray, np.ndarray, List[Staff], int]:
+        """
+        Preprocess an image and remove its staff lines, at most once per key
+
+        Results are looked up in the in-process table, then in the disk cache,
+        and only computed if both miss. If another thread is already computing
+        the same key, this waits for it and reuses its result.
+
+        Args:
+            key: Cache key of the input image
+            input_image_path: Path to input sheet music image
+
+        Returns:
+            Tuple of (binary image, image without staff lines, staves, line thickness)
+        """
+        cls = SheetMusicConverter
+        while True:
+            with cls._results_lock:
+                result = cls._results.get(key)
+                if result is not None:
+                    cls._results.move_to_end(key)
+                    print("\n[1/4] Reusing preprocessing results...")
+                    return result
+                event = cls._inflight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    cls._inflight[key] = event
+                    break
+            # Another conversion owns this key; if it fails the loop retries
+            event.wait()
+
+        try:
+            result = self._preprocess_and_remove_staves(key, input_image_path)
+            for image in result[:2]:
+                image.flags.writeable = False
+            with cls._results_lock:
+                cls._results[key] = result
+                if len(cls._results) > cls._max_shared_results:
+                    cls._results.popitem(last=False)
+        finally:
+            with cls._results_lock:
+                del cls._inflight[key]
+            event.set()
+        return result
+
+    def _preprocess_and_remove_staves(self, key: Optional[str], input_image_path: str) -> tuple:
+        """Run steps 1-2 and staff removal, going through the disk cache if enabled"""
+        if self.preprocess_cache is not None:
+            cached = self.preprocess_cache.load(key)
+            if cached is not None:
+                print("\n[1/4] Using cached preprocessing results...")
+                return cached
+
+        # Step 1: Preprocess image
+        print("\n[1/4] Preprocessing image...")
+        binary_image = self.image_processor.full_preprocessing_pipeline(input_image_path)
+
+        # Step 2: Detect staff lines
+        print("\n[2/4] Detecting staff lines...")
+        staves = self.staff_detector.detect_staves(binary_image)
+
+        # Remove staff lines to isolate symbols
+        image_no_staff = self.staff_detector.remove_staff_lines(binary_image)
+        result = (binary_image, image_no_staff, staves, self.staff_detector.line_thickness)
+
+        if self.preprocess_cache is not None:
+            self.preprocess_cache.store(key, *result)
+        return result
+
+    def convert_ndarray(self, image: np.ndarray, output_midi_path: str,
+                        save_intermediate: bool = False) -> str:
+        """
+        Convert an already decoded sheet music image to MIDI file
+
+        Args:
+            image: Sheet music image as a BGR or grayscale numpy array
+            output_midi_path: Path where MIDI file will be saved
+            save_intermediate: Whether to save intermediate processing images
+
+        Returns:
+            Path to generated MIDI file
+        """
+        print("Converting in-memory image to MIDI...")
+
         # Step 1: Preprocess image
         print("\n[1/4] Preprocessing image...")
-        self.binary_image = self.image_processor.full_preprocessing_pipeline(input_image_path)
+        self.binary_image = self.image_processor.preprocess_array(image)
 
+        try:
+            return self._convert_binary_image("<in-memory image>", output_midi_path,
+                                              save_intermediate)
+        finally:
+            self._flush_intermediate_images()
+
+    def _convert_binary_image(self, input_label: str, output_midi_path: str,
+                              save_intermediate: bool,
+                              staves: Optional[List[Staff]] = None) -> str:
+        """
+        Run staff detection, symbol detection and MIDI generation on self.binary_image
+
+        If staves is given, staff detection and removal are skipped and
+        self.image_no_staff must already hold the staff-free image.
+        """
         if save_intermediate:
             self._save_intermediate_image(self.binary_image, output_midi_path, "_1_preprocessed.png")
 
-        # Step 2: Detect staff lines
-        print("\n[2/4] Detecting staff lines...")
-        staves = self.staff_detector.detect_staves(self.binary_image)
+        if staves is None:
+            # Step 2: Detect staff lines
+            print("\n[2/4] Detecting staff lines...")
+            staves = self.staff_detector.detect_staves(self.binary_image)
+
+            # Remove staff lines to isolate symbols
+            self.image_no_staff = self.staff_detector.remove_staff_lines(self.binary_image)
 
         if not staves:
             print("Warning: No staff lines detected. Results may be inaccurate.")
 
-        # Remove staff lines to isolate symbols
-        self.image_no_staff = self.staff_detector.remove_staff_lines(self.binary_image)
-
         if save_intermediate:
             self._save_intermediate_image(self.image_no_staff, output_midi_path, "_2_no_staff.png")
 
         # Step 3: Detect and recognize symbols
         print("\n[3/4] Detecting musical symbols...")
+        self.symbol_detector.reset()
         symbols = self.symbol_detector.detect_symbols(
             self.binary_image,
             self.image_no_staff,
@@ -97,22 +279,29 @@ class SheetMusicConverter:
 
         # Print summary
         print(f"\n✓ Conversion complete!")
-        print(f"  Input:  {input_image_path}")
+        print(f"  Input:  {input_label}")
         print(f"  Output: {output_midi_path}")
         print(f"  Detected: {len(staves)} staff/staves, {len(symbols)} notes")
 
         return output_midi_path
 
     def batch_convert(self, input_dir: str, output_dir: str,
-                     file_extensions: Optional[List[str]] = None) -> List[str]:
+                     file_extensions: Optional[List[str]] = None,
+                     jobs: Optional[int] = 1) -> List[str]:
         """
         Convert multiple sheet music images to MIDI files
 
+        Images are independent, so they are converted in parallel worker
+        processes, each with its own converter using this converter's settings.
+
         Args:
             input_dir: Directory containing input images
             output_dir: Directory where MIDI files will be saved
             file_extensions: List of image file extensions to process
                            (default: ['.png', '.jpg', '.jpeg', '.bmp'])
+            jobs: Number of worker processes (default: 1, which converts
+                  images sequentially in this process). None uses
+                  os.cpu_count() workers.
 
         Returns:
             List of paths to generated MIDI files
@@ -124,31 +313,39 @@ class SheetMusicConverter:
         os.makedirs(output_dir, exist_ok=True)
 
         # Find all image files
-        image_files = []
-        for root, dirs, files in os.walk(input_dir):
-            for file in files:
-                if any(file.lower().endswith(ext) for ext in file_extensions):
-                    image_files.append(os.path.join(root, file))
+        image_files = sorted(_iter_image_files(input_dir, file_extensions))
 
         print(f"Found {len(image_files)} image(s) to convert")
 
-        # Convert each image
-        output_files = []
-        for i, image_path in enumerate(image_files, 1):
-            print(f"\n{'='*60}")
-            print(f"Processing {i}/{len(image_files)}: {os.path.basename(image_path)}")
-            print('='*60)
+        # Output paths are built by plain string formatting; every matched
+        # name has an extension, so rsplit stands in for os.path.splitext
+        output_prefix = os.path.join(output_dir, '')
+        total = len(image_files)
+        tasks = [
+            (i, total, image_path, name, f"{output_prefix}{name.rsplit('.', 1)[0]}.mid")
+            for i, (image_path, name) in enumerate(image_files, 1)
+        ]
 
-            # Generate output path
-            base_name = os.path.splitext(os.path.basename(image_path))[0]
-            output_path = os.path.join(output_dir, f"{base_name}.mid")
+        # Convert each image
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+        workers = min(jobs, len(tasks))
+        if workers <= 1:
+            results = [_convert_batch_item(self, task) for task in tasks]
+        else:
+            settings = {
+                'tempo': self.tempo,
+                'clef': self.clef,
+                'preprocess_resize': self.preprocess_resize,
+                'cache_dir': self.cache_dir,
+                'share_results': self.share_results,
+            }
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_batch_worker,
+                                     initargs=(settings,)) as executor:
+                results = list(executor.map(_convert_in_worker, tasks, chunksize=1))
 
-            try:
-                self.convert(image_path, output_path)
-                output_files.append(output_path)
-            except Exception as e:
-                print(f"Error converting {image_path}: {e}")
-                continue
+        output_files = [path for path in results if path is not None]
 
         print(f"\n{'='*60}")
         print(f"Batch conversion complete: {len(output_files)}/{len(image_files)} successful")
@@ -171,18 +368,44 @@ class SheetMusicConverter:
         """
         print(f"Converting {len(image_paths)} page(s) to single MIDI file...")
 
-        all_symbols = []
-        total_staves = 0
+        return self._convert_page_stream(image_paths, len(image_paths),
+                                         output_midi_path, save_intermediate)
+
+    def _convert_page_stream(self, pages: Iterable[Union[str, np.ndarray]],
+                             num_pages: int, output_midi_path: str,
+                             save_intermediate: bool) -> str:
+        """
+        Run the multipage pipeline over pages that may be produced lazily
+
+        Args:
+            pages: Image paths or decoded images, in page order. The iterable
+                  is consumed by a reader thread only as fast as the pipeline
+                  takes pages, so a generator never has more than a few
+                  pages in memory.
+            num_pages: Number of pages, for progress output
+            output_midi_path: Path where combined MIDI file will be saved
+            save_intermediate: Whether to save intermediate processing images
 
-        # Process each page
-        for page_num, image_path in enumerate(image_paths, 1):
+        Returns:
+            Path to generated MIDI file
+        """
+        # Pages flow through three worker threads connected by bounded queues:
+        # preprocess -> staff detection/removal -> symbol detection. The heavy
+        # OpenCV/NumPy work releases the GIL, so stages overlap across pages.
+        # Each page gets its own StaffDetector because the staff stage runs
+        # ahead of the symbol stage that reads that page's staves.
+        def preprocess_page(page_num, page):
+            label = "in-memory image" if isinstance(page, np.ndarray) else os.path.basename(page)
             print(f"\n{'='*60}")
-            print(f"Processing page {page_num}/{len(image_paths)}: {os.path.basename(image_path)}")
+            print(f"Processing page {page_num}/{num_pages}: {label}")
             print('='*60)
 
             # Step 1: Preprocess image
             print(f"\n[Page {page_num}] Preprocessing image...")
-            binary_image = self.image_processor.full_preprocessing_pipeline(image_path)
+            if isinstance(page, np.ndarray):
+                binary_image = self.image_processor.preprocess_array(page)
+            else:
+                binary_image = self.image_processor.full_preprocessing_pipeline(page)
 
             if save_intermediate:
                 self._save_intermediate_image(
@@ -191,17 +414,19 @@ class SheetMusicConverter:
                     f"_page{page_num}_preprocessed.png"
                 )
 
+            return binary_image
+
+        def detect_page_staves(page_num, binary_image):
             # Step 2: Detect staff lines
             print(f"\n[Page {page_num}] Detecting staff lines...")
-            staves = self.staff_detector.detect_staves(binary_image)
+            staff_detector = StaffDetector()
+            staves = staff_detector.detect_staves(binary_image)
 
             if not staves:
                 print(f"Warning: No staff lines detected on page {page_num}")
 
-            total_staves += len(staves)
-
             # Remove staff lines
-            image_no_staff = self.staff_detector.remove_staff_lines(binary_image)
+            image_no_staff = staff_detector.remove_staff_lines(binary_image)
 
             if save_intermediate:
                 self._save_intermediate_image(
@@ -210,26 +435,76 @@ class SheetMusicConverter:
                     f"_page{page_num}_no_staff.png"
                 )
 
+            return binary_image, image_no_staff, staff_detector
+
+        def detect_page_symbols(page_num, page):
+            binary_image, image_no_staff, staff_detector = page
+
             # Step 3: Detect symbols
             print(f"\n[Page {page_num}] Detecting musical symbols...")
+            self.symbol_detector.reset()
+            self.symbol_detector.staff_detector = staff_detector
+            # Offset symbol x-positions to account for page order
+            # Add spacing between pages (equivalent to 2 measures)
             page_symbols = self.symbol_detector.detect_symbols(
                 binary_image,
                 image_no_staff,
-                clef=self.clef
+                clef=self.clef,
+                x_offset=page_num * 2000  # Arbitrary spacing in pixels
             )
 
-            if page_symbols:
-                # Offset symbol x-positions to account for page order
-                # Add spacing between pages (equivalent to 2 measures)
-                page_offset = page_num * 2000  # Arbitrary spacing in pixels
+            return page_symbols, staff_detector
+
+        queues = [queue.Queue(maxsize=2) for _ in range(4)]
+        stages = [preprocess_page, detect_page_staves, detect_page_symbols]
+        stop_reading = threading.Event()
+        workers = [
+            threading.Thread(target=_feed_pipeline,
+                             args=(pages, queues[0], stop_reading), daemon=True)
+        ] + [
+            threading.Thread(target=_run_pipeline_stage,
+                             args=(stage, queues[i], queues[i + 1]), daemon=True)
+            for i, stage in enumerate(stages)
+        ]
+        for worker in workers:
+            worker.start()
 
-                for symbol in page_symbols:
-                    symbol.x += page_offset
+        all_symbols = []
+        total_staves = 0
+        last_staff_detector = None
 
-                all_symbols.extend(page_symbols)
-                print(f"  Added {len(page_symbols)} symbols from page {page_num}")
-            else:
-                print(f"  Warning: No symbols detected on page {page_num}")
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _PIPELINE_DONE:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+
+                page_num, (page_symbols, last_staff_detector) = item
+                total_staves += len(last_staff_detector.staves)
+
+                if page_symbols:
+                    all_symbols.extend(page_symbols)
+                    print(f"  Added {len(page_symbols)} symbols from page {page_num}")
+                else:
+                    print(f"  Warning: No symbols detected on page {page_num}")
+        except BaseException:
+            # Stop reading new pages and drain the stages so they can exit
+            stop_reading.set()
+            while queues[-1].get() is not _PIPELINE_DONE:
+                pass
+            raise
+        finally:
+            for worker in workers:
+                worker.join()
+            self._flush_intermediate_images()
+
+            # Leave the converter's detectors describing the last page
+            if last_staff_detector is not None:
+                self.staff_detector.staves = last_staff_detector.staves
+                self.staff_detector.line_thickness = last_staff_detector.line_thickness
+            self.symbol_detector.staff_detector = self.staff_detector
 
         # Step 4: Generate combined MIDI file
         print(f"\n{'='*60}")
@@ -248,7 +523,7 @@ class SheetMusicConverter:
 
         # Print summary
         print(f"\n✓ Multi-page conversion complete!")
-        print(f"  Pages processed: {len(image_paths)}")
+        print(f"  Pages processed: {num_pages}")
         print(f"  Total staves: {total_staves}")
         print(f"  Total symbols: {len(all_symbols)}")
         print(f"  Output: {output_midi_path}")
@@ -257,7 +532,7 @@ class SheetMusicConverter:
 
     def convert_pdf(self, pdf_path: str, output_midi_path: str,
                    dpi: int = 300, save_intermediate: bool = False,
-                   cleanup_temp: bool = True) -> str:
+                   cleanup_temp: Optional[bool] = None) -> str:
         """
         Convert a PDF of sheet music to MIDI file
 
@@ -266,55 +541,94 @@ class SheetMusicConverter:
             output_midi_path: Path where MIDI file will be saved
             dpi: Resolution for PDF to image conversion (default 300)
             save_intermediate: Whether to save intermediate processing images
-            cleanup_temp: Whether to delete temporary image files after conversion
+            cleanup_temp: Deprecated and ignored; pages are rendered in
+                         memory, so no temporary files are created
 
         Returns:
             Path to generated MIDI file
+
+        Raises:
+            ImportError: If PyMuPDF is not installed
+            RuntimeError: If pages cannot be extracted from the PDF, including
+                         a missing or empty file or a page that fails to render
         """
-        from .utils import PDFHandler
+        if cleanup_temp is not None:
+            warnings.warn(
+                "convert_pdf's cleanup_temp argument is deprecated and ignored; "
+                "pages are rendered in memory, so there are no temporary files",
+                DeprecationWarning,
+                stacklevel=2
+            )
 
         # Check if PDF support is available
         if not PDFHandler.is_pdf_supported():
             raise ImportError(
-                "PDF support requires pdf2image library. "
-                "Install it with: pip install pdf2image\n"
-                "Note: pdf2image also requires poppler to be installed on your system."
+                "PDF support requires the PyMuPDF library. "
+                "Install it with: pip install PyMuPDF"
             )
 
         print(f"Converting PDF '{pdf_path}' to MIDI...")
 
-        # Convert PDF to images
         try:
-            image_paths = PDFHandler.pdf_to_images(pdf_path, dpi=dpi)
+            num_pages = PDFHandler.get_page_count(pdf_path)
         except Exception as e:
             raise RuntimeError(f"Failed to extract images from PDF: {e}")
 
-        if not image_paths:
+        if num_pages == 0:
             raise ValueError("No pages could be extracted from PDF")
 
-        # Convert the extracted images to MIDI
-        try:
-            result = self.convert_multipage(
-                image_paths,
-                output_midi_path,
-                save_intermediate=save_intermediate
-            )
-        finally:
-            # Clean up temporary image files
-            if cleanup_temp:
-                print("\nCleaning up temporary files...")
-                PDFHandler.cleanup_temp_images(image_paths)
-
-        return result
+        # Pages are rendered one at a time as the pipeline asks for them
+        print(f"Converting {num_pages} PDF page(s) to single MIDI file (DPI: {dpi})...")
+        return self._convert_page_stream(
+            _wrap_pdf_page_errors(PDFHandler.iter_pdf_pages(pdf_path, dpi=dpi)),
+            num_pages,
+            output_midi_path,
+            save_intermediate
+        )
 
     def _save_intermediate_image(self, image, output_midi_path: str, suffix: str):
-        """Save intermediate processing image for debugging"""
-        import cv2
+        """Queue an intermediate processing image for the background writer"""
         base_name = os.path.splitext(output_midi_path)[0]
         intermediate_path = f"{base_name}{suffix}"
-        cv2.imwrite(intermediate_path, image)
+        if image.flags.writeable:
+            # The caller may keep modifying its array while the write is pending
+            image = image.copy()
+        self._get_intermediate_queue().put((intermediate_path, image))
         print(f"  Saved intermediate image: {intermediate_path}")
 
+    def _get_intermediate_queue(self) -> queue.Queue:
+        """Return the intermediate image queue, starting its writer thread if needed"""
+        with self._intermediate_lock:
+            if self._intermediate_queue is None:
+                self._intermediate_queue = queue.Queue()
+                self._intermediate_writer = threading.Thread(
+                    target=_write_intermediate_images,
+                    args=(self._intermediate_queue,),
+                    daemon=True
+                )
+                self._intermediate_writer.start()
+            return self._intermediate_queue
+
+    def _flush_intermediate_images(self):
+        """Block until all queued intermediate images have been written"""
+        if self._intermediate_queue is not None:
+            self._intermediate_queue.join()
+
+    def close(self):
+        """Write any pending intermediate images and stop the background writer"""
+        with self._intermediate_lock:
+            if self._intermediate_queue is None:
+                return
+            self._intermediate_queue.put(_PIPELINE_DONE)
+            self._intermediate_writer.join()
+            self._intermediate_queue = None
+            self._intermediate_writer = None
+
+    def __del__(self):
+        # __init__ may not have finished if it raised
+        if getattr(self, '_intermediate_lock', None) is not None:
+            self.close()
+
     def get_processing_info(self) -> dict:
         """
         Get information about the last conversion process
@@ -339,14 +653,143 @@ class SheetMusicConverter:
                 for staff in self.staff_detector.staves
             ]
 
-        if self.symbol_detector.symbols:
+        symbols = self.symbol_detector.symbols
+        if symbols:
             info['symbol_summary'] = {
-                'total': len(self.symbol_detector.symbols),
-                'by_type': {}
+                'total': len(symbols),
+                'by_type': dict(Counter(map(_symbol_type_value, symbols)))
             }
-            for symbol in self.symbol_detector.symbols:
-                symbol_type = symbol.symbol_type.value
-                info['symbol_summary']['by_type'][symbol_type] = \
-                    info['symbol_summary']['by_type'].get(symbol_type, 0) + 1
 
         return info
+
+
+def _iter_image_files(input_dir: str, file_extensions: List[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (path, file name) of files under input_dir whose extension is in file_extensions
+
+    Walks the tree with os.scandir, reusing its cached entry types, and
+    skips hidden directories such as .git.
+    """
+    suffixes = tuple(ext.lower() for ext in file_extensions)
+    stack = [input_dir]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith('.'):
+                        stack.append(entry.path)
+                elif entry.name.lower().endswith(suffixes):
+                    yield entry.path, entry.name
+
+
+def _wrap_pdf_page_errors(pages: Iterator[np.ndarray]) -> Iterator[np.ndarray]:
+    """Yield rendered PDF pages, raising rendering errors as RuntimeError like convert_pdf"""
+    try:
+        yield from pages
+    except Exception as e:
+        raise RuntimeError(f"Failed to extract images from PDF: {e}")
+
+
+def _convert_batch_item(converter: SheetMusicConverter, task: tuple) -> Optional[str]:
+    """Convert one batch image, returning its MIDI path or None on failure"""
+    i, total, image_path, name, output_path = task
+    print(f"\n{'='*60}")
+    print(f"Processing {i}/{total}: {name}")
+    print('='*60)
+
+    try:
+        converter.convert(image_path, output_path)
+        return output_path
+    except Exception as e:
+        print(f"Error converting {image_path}: {e}")
+        return None
+
+
+def _init_batch_worker(settings: dict) -> None:
+    """
+    Batch worker initializer
+
+    Builds the converter this worker process reuses for every image, and uses
+    one OpenCV thread per process to avoid oversubscription.
+    """
+    global _worker_converter
+    cv2.setNumThreads(1)
+    _worker_converter = SheetMusicConverter(**settings)
+
+
+def _convert_in_worker(task: tuple) -> Optional[str]:
+    """Batch worker entry point; converts one image with the worker's converter"""
+    return _convert_batch_item(_worker_converter, task)
+
+
+def _write_intermediate_images(inbox: queue.Queue) -> None:
+    """
+    Background writer loop for intermediate images
+
+    PNG-encodes each (path, image) item from inbox with fast compression and
+    writes it through a large buffer, until the end-of-input marker arrives.
+    Write errors are reported and do not stop the conversion.
+    """
+    while True:
+        item = inbox.get()
+        try:
+            if item is _PIPELINE_DONE:
+                return
+            path, image = item
+            ok, encoded = cv2.imencode('.png', image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+            if not ok:
+                raise OSError("PNG encoding failed")
+            with open(path, 'wb', buffering=8 * 1024 * 1024) as f:
+                f.write(encoded)
+        except (OSError, cv2.error) as e:
+            print(f"Warning: Could not save intermediate image {path}: {e}")
+        finally:
+            inbox.task_done()
+
+
+def _feed_pipeline(pages: Iterable, outbox: queue.Queue, stop: threading.Event) -> None:
+    """
+    Reader loop at the head of the multipage pipeline
+
+    Numbers the pages and puts them on outbox. Because outbox is bounded,
+    a lazy iterable is only advanced as the first stage takes pages. Errors
+    from the iterable are passed downstream, and the end-of-input marker is
+    always sent last.
+    """
+    try:
+        for item in enumerate(pages, 1):
+            if stop.is_set():
+                break
+            outbox.put(item)
+    except Exception as e:
+        outbox.put(e)
+    finally:
+        outbox.put(_PIPELINE_DONE)
+
+
+def _run_pipeline_stage(func: Callable, inbox: queue.Queue, outbox: queue.Queue) -> None:
+    """
+    Worker loop for one stage of the multipage pipeline
+
+    Applies func to each (page_num, payload) item from inbox and forwards
+    (page_num, result) to outbox. The end-of-input marker and any exception
+    are passed downstream; after an error the remaining input is drained
+    (without producing results) so upstream stages never block on a full queue.
+    """
+    failed = False
+    while True:
+        item = inbox.get()
+        if item is _PIPELINE_DONE:
+            outbox.put(item)
+            return
+        if failed:
+            continue
+        if isinstance(item, BaseException):
+            outbox.put(item)
+            failed = True
+            continue
+        try:
+            outbox.put((item[0], func(*item)))
+        except Exception as e:
+            outbox.put(e)
+            failed = True
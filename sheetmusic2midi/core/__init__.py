@@ -1,6 +1,6 @@
 """Core modules for sheet music processing"""
 
-from .image_processor import ImageProcessor
+from .image_processor import ImageProcessor, default_preprocess
 from .staff_detector import StaffDetector
 from .symbol_detector import (
     SymbolDetector,
@@ -15,6 +15,7 @@ from .midi_generator import MidiGenerator
 
 __all__ = [
     "ImageProcessor",
+    "default_preprocess",
     "StaffDetector",
     "SymbolDetector",
     "SymbolType",
@@ -1,31 +1,126 @@
 """Image preprocessing for sheet music OCR"""
 
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import cv2
 import numpy as np
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Fewest foreground pixels deskew needs for a trustworthy angle estimate
+MIN_DESKEW_POINTS = 500
+
+
+@lru_cache(maxsize=None)
+def _rect_kernel(size: int) -> np.ndarray:
+    """Rectangular structuring element of the given size, built once and shared"""
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+    kernel.flags.writeable = False
+    return kernel
+
+
+def _threshold_adaptive(image: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+    """Adaptive thresholding works well for varying lighting"""
+    return cv2.adaptiveThreshold(
+        image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY_INV, 15, 10, dst=dst
+    )
+
+
+def _threshold_otsu(image: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+    """Otsu's method automatically finds optimal threshold"""
+    return cv2.threshold(image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU, dst=dst)[1]
+
+
+def _threshold_simple(image: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+    """Fixed threshold at mid-gray"""
+    return cv2.threshold(image, 127, 255, cv2.THRESH_BINARY_INV, dst=dst)[1]
+
+
+# Binarization methods by name; unknown names fall back to 'simple'
+_THRESHOLD_FUNCTIONS = {
+    'adaptive': _threshold_adaptive,
+    'otsu': _threshold_otsu,
+    'simple': _threshold_simple,
+}
+
+
+def _rotation_matrix(image_shape: Tuple[int, ...], angle: float) -> np.ndarray:
+    """Affine matrix rotating an image of the given shape about its center"""
+    (h, w) = image_shape[:2]
+    return cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+
+
+def default_preprocess(image: np.ndarray, target_h: int = 128) -> np.ndarray:
+    """
+    Downscale an image to a fixed height, preserving its aspect ratio
+
+    Args:
+        image: Input image (BGR or grayscale)
+        target_h: Target height in pixels
+
+    Returns:
+        Resized image, or the input unchanged if it is not taller than target_h
+    """
+    h, w = image.shape[:2]
+    if h <= target_h:
+        return image
+
+    target_w = max(1, int(w * target_h / h))
+    return cv2.resize(image, (target_w, target_h), interpolation=cv2.INTER_AREA)
 
 
 class ImageProcessor:
     """Handles image loading and preprocessing for sheet music recognition"""
 
-    def __init__(self):
+    def __init__(self, target_height: Optional[int] = None, blur_kernel_size: int = 3,
+                 threshold_method: str = 'adaptive'):
+        """
+        Initialize the image processor
+
+        Args:
+            target_height: If set, images are downscaled to this height
+                          before preprocessing (None keeps full resolution)
+            blur_kernel_size: Size (odd) of the Gaussian blur applied before
+                             binarization; larger values suit noisier scans
+            threshold_method: Default binarization method, 'adaptive',
+                             'otsu' or 'simple'
+        """
+        self.target_height = target_height
+        self.blur_kernel_size = blur_kernel_size
+        self.threshold_method = threshold_method
+        # Resolved once so the pipeline does not compare strings per image
+        self._threshold = _THRESHOLD_FUNCTIONS.get(threshold_method, _threshold_simple)
         self.original_image = None
         self.processed_image = None
         self.binary_image = None
 
-    def load_image(self, image_path: str) -> np.ndarray:
+        # Reusable buffers for the intermediate steps of preprocess_array
+        self._scratch_a: Optional[np.ndarray] = None
+        self._scratch_b: Optional[np.ndarray] = None
+
+    def load_image(self, image_path: str, grayscale: bool = True) -> np.ndarray:
         """
         Load an image from file path
 
         Args:
             image_path: Path to the sheet music image
+            grayscale: Decode straight to a single grayscale channel, which is
+                      all preprocessing uses (False keeps the BGR colour image)
 
         Returns:
             Loaded image as numpy array
         """
-        self.original_image = cv2.imread(image_path)
-        if self.original_image is None:
+        flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+        image = cv2.imread(image_path, flags)
+        if image is None:
             raise ValueError(f"Could not load image from {image_path}")
+        self.original_image = np.ascontiguousarray(image)
         return self.original_image
 
     def preprocess(self, image: Optional[np.ndarray] = None) -> np.ndarray:
@@ -47,22 +142,25 @@ class ImageProcessor:
         if len(image.shape) == 3:
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         else:
-            gray = image.copy()
+            # GaussianBlur writes a new array and never modifies its input
+            gray = image
 
         # Apply slight Gaussian blur to reduce noise
-        blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+        k = self.blur_kernel_size
+        blurred = cv2.GaussianBlur(gray, (k, k), 0)
 
         self.processed_image = blurred
         return blurred
 
     def binarize(self, image: Optional[np.ndarray] = None,
-                 threshold_method: str = 'adaptive') -> np.ndarray:
+                 threshold_method: Optional[str] = None) -> np.ndarray:
         """
         Convert image to binary (black and white)
 
         Args:
             image: Input grayscale image (uses processed image if None)
             threshold_method: 'adaptive' or 'otsu' or 'simple'
+                             (default: the method given at construction)
 
         Returns:
             Binary image
@@ -72,31 +170,24 @@ class ImageProcessor:
                 raise ValueError("No processed image. Call preprocess first.")
             image = self.processed_image
 
-        if threshold_method == 'adaptive':
-            # Adaptive thresholding works well for varying lighting
-            binary = cv2.adaptiveThreshold(
-                image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY_INV, 15, 10
-            )
-        elif threshold_method == 'otsu':
-            # Otsu's method automatically finds optimal threshold
-            _, binary = cv2.threshold(
-                image, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
-            )
-        else:  # simple
-            _, binary = cv2.threshold(image, 127, 255, cv2.THRESH_BINARY_INV)
+        if threshold_method is None:
+            threshold = self._threshold
+        else:
+            threshold = _THRESHOLD_FUNCTIONS.get(threshold_method, _threshold_simple)
+        binary = threshold(image)
 
         self.binary_image = binary
         return binary
 
     def remove_noise(self, binary_image: Optional[np.ndarray] = None,
-                     kernel_size: int = 2) -> np.ndarray:
+                     kernel_size: int = 2, iterations: int = 1) -> np.ndarray:
         """
         Remove small noise from binary image using morphological operations
 
         Args:
             binary_image: Input binary image (uses binary image if None)
             kernel_size: Size of morphological kernel
+            iterations: Number of times the opening is applied
 
         Returns:
             Denoised binary image
@@ -107,26 +198,39 @@ class ImageProcessor:
             binary_image = self.binary_image
 
         # Remove small noise
-        kernel = np.ones((kernel_size, kernel_size), np.uint8)
-        opened = cv2.morphologyEx(binary_image, cv2.MORPH_OPEN, kernel)
+        kernel = _rect_kernel(kernel_size)
+        opened = cv2.morphologyEx(binary_image, cv2.MORPH_OPEN, kernel,
+                                  iterations=iterations)
 
         return opened
 
-    def deskew(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
+    def deskew(self, image: np.ndarray,
+               interpolation: int = cv2.INTER_CUBIC,
+               rotate_pixels: bool = True) -> Tuple[np.ndarray, float]:
         """
         Detect and correct image skew/rotation
 
         Args:
             image: Input binary image
+            interpolation: OpenCV interpolation flag used for the rotation.
+                          cv2.INTER_LINEAR is about twice as fast but can
+                          change which symbols are recognized
+            rotate_pixels: If False, only measure the skew: the image is
+                          returned unrotated, and callers can map detected
+                          coordinates with rotate_points instead of paying
+                          for a full-image warp
 
         Returns:
             Tuple of (deskewed image, rotation angle in degrees)
         """
-        # Find all non-zero points (staff lines and symbols)
-        coords = np.column_stack(np.where(image > 0))
-
-        # Calculate rotation angle using minimum area rectangle
-        if len(coords) > 0:
+        # Find all non-zero points (staff lines and symbols) in one C pass.
+        # findNonZero gives (x, y); the angle convention below expects (y, x).
+        points = cv2.findNonZero(image)
+
+        # Calculate rotation angle using minimum area rectangle; with too few
+        # points the angle is unreliable, so the image is left as is
+        if points is not None and len(points) >= MIN_DESKEW_POINTS:
+            coords = points.reshape(-1, 2)[:, ::-1]
             angle = cv2.minAreaRect(coords)[-1]
 
             # Correct the angle
@@ -137,18 +241,72 @@ class ImageProcessor:
 
             # Rotate image
             if abs(angle) > 0.5:  # Only rotate if significant skew
+                if not rotate_pixels:
+                    return image, angle
                 (h, w) = image.shape[:2]
-                center = (w // 2, h // 2)
-                M = cv2.getRotationMatrix2D(center, angle, 1.0)
+                M = _rotation_matrix(image.shape, angle)
                 rotated = cv2.warpAffine(
                     image, M, (w, h),
-                    flags=cv2.INTER_CUBIC,
+                    flags=interpolation,
                     borderMode=cv2.BORDER_REPLICATE
                 )
                 return rotated, angle
 
         return image, 0.0
 
+    @staticmethod
+    def rotate_points(points: np.ndarray, angle: float,
+                      image_shape: Tuple[int, ...]) -> np.ndarray:
+        """
+        Map (x, y) points through the rotation deskew would apply to an image
+
+        Args:
+            points: Array of shape (N, 2) with x, y coordinates
+            angle: Rotation angle in degrees, as returned by deskew
+            image_shape: Shape of the image the points were found in
+
+        Returns:
+            Array of shape (N, 2) with the rotated float32 coordinates
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2)
+        return cv2.transform(points, _rotation_matrix(image_shape, angle)).reshape(-1, 2)
+
+    def _binarize_and_denoise(self, image: np.ndarray, kernel_size: int = 2) -> np.ndarray:
+        """
+        Same steps as preprocess, binarize and remove_noise
+
+        The intermediate images are written into two scratch buffers kept
+        between calls instead of fresh arrays, and are not stored on self.
+        Only the returned image is newly allocated, so callers may hold on
+        to it.
+
+        Args:
+            image: Input image (BGR or grayscale)
+            kernel_size: Size of morphological kernel
+
+        Returns:
+            Denoised binary image
+        """
+        shape = image.shape[:2]
+        if self._scratch_a is None or self._scratch_a.shape != shape:
+            self._scratch_a = np.empty(shape, dtype=np.uint8)
+            self._scratch_b = np.empty(shape, dtype=np.uint8)
+        scratch_a, scratch_b = self._scratch_a, self._scratch_b
+
+        if len(image.shape) == 3:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=scratch_a)
+        else:
+            gray = image
+        k = self.blur_kernel_size
+        blurred = cv2.GaussianBlur(gray, (k, k), 0, dst=scratch_b)
+        binary = self._threshold(blurred, dst=scratch_a)
+
+        # Opening as erode then dilate, so the eroded image also lands in
+        # scratch rather than in a temporary allocated by morphologyEx
+        kernel = _rect_kernel(kernel_size)
+        eroded = cv2.erode(binary, kernel, dst=scratch_b)
+        return cv2.dilate(eroded, kernel)
+
     def full_preprocessing_pipeline(self, image_path: str) -> np.ndarray:
         """
         Complete preprocessing pipeline from image path to clean binary image
@@ -162,19 +320,65 @@ class ImageProcessor:
         # Load image
         self.load_image(image_path)
 
-        # Preprocess
-        processed = self.preprocess()
+        return self.preprocess_array(self.original_image)
+
+    def preprocess_array(self, image: np.ndarray) -> np.ndarray:
+        """
+        Complete preprocessing pipeline for an already decoded image
+
+        Args:
+            image: Sheet music image as a BGR or grayscale numpy array
 
-        # Binarize
-        binary = self.binarize(processed)
+        Returns:
+            Preprocessed binary image ready for staff/symbol detection
+        """
+        if self.target_height is not None:
+            image = default_preprocess(image, self.target_height)
+        self.original_image = image
 
-        # Remove noise
-        denoised = self.remove_noise(binary)
+        # Grayscale, blur, binarize and remove noise in one pass
+        denoised = self._binarize_and_denoise(image)
 
         # Deskew
         deskewed, angle = self.deskew(denoised)
 
         if abs(angle) > 0.5:
-            print(f"Image was rotated by {angle:.2f} degrees")
+            logger.debug("Image was rotated by %.2f degrees", angle)
 
         return deskewed
+
+    def apply_to_images(self, image_paths: List[str],
+                        max_workers: Optional[int] = None) -> List[np.ndarray]:
+        """
+        Run the full preprocessing pipeline on several images in parallel
+
+        Pages are independent and OpenCV releases the GIL, so they are
+        processed on a thread pool. Each thread uses its own ImageProcessor
+        with this processor's settings, so this processor's state is not
+        touched.
+
+        Args:
+            image_paths: Paths to sheet music images
+            max_workers: Number of threads (default: os.cpu_count())
+
+        Returns:
+            Preprocessed binary images, in the same order as image_paths
+        """
+        local = threading.local()
+        results: List[Optional[np.ndarray]] = [None] * len(image_paths)
+
+        def process_one(index: int, image_path: str) -> None:
+            processor = getattr(local, 'processor', None)
+            if processor is None:
+                processor = local.processor = ImageProcessor(self.target_height,
+                                                             self.blur_kernel_size,
+                                                             self.threshold_method)
+            results[index] = processor.full_preprocessing_pipeline(image_path)
+
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            futures = [executor.submit(process_one, i, path)
+                       for i, path in enumerate(image_paths)]
+            for future in futures:
+                future.result()
+
+        return results
@@ -1,10 +1,76 @@
 """MIDI file generation from detected musical symbols"""
 
+import io
+import logging
+from functools import lru_cache
 import mido
+import numpy as np
 from mido import MidiFile, MidiTrack, Message, MetaMessage
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from .symbol_detector import MusicalSymbol, NoteDuration, SymbolType, TimeSignature
 
+logger = logging.getLogger(__name__)
+
+
+# Channel 0 status bytes; Message.from_bytes skips keyword argument parsing
+_NOTE_ON = 0x90
+_NOTE_OFF = 0x80
+
+# Base note to semitone mapping
+_BASE_NOTES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+# Symbol types played as silence in polyphonic output
+_REST_TYPES = frozenset({SymbolType.WHOLE_REST, SymbolType.HALF_REST,
+                         SymbolType.QUARTER_REST, SymbolType.EIGHTH_REST})
+
+
+@lru_cache(maxsize=256)
+def _note_name_to_midi(note_name: str) -> int:
+    """Parse a note name into a MIDI note number; cached, as scores reuse few pitches"""
+    if not note_name or len(note_name) < 2:
+        return 60  # Default to C4
+
+    # Parse note name and octave
+    # Extract octave (last character)
+    try:
+        octave = int(note_name[-1])
+        note = note_name[:-1]
+    except ValueError:
+        octave = 4
+        note = note_name
+
+    # Get base note
+    base_note = note[0].upper()
+    if base_note not in _BASE_NOTES:
+        return 60  # Default
+
+    semitone = _BASE_NOTES[base_note]
+
+    # Apply accidentals
+    accidental_part = note[1:]
+    if '#' in accidental_part:
+        semitone += accidental_part.count('#')
+    if 'b' in accidental_part:
+        semitone -= accidental_part.count('b')
+
+    # Calculate MIDI number
+    midi_number = (octave + 1) * 12 + semitone
+
+    # Clamp to valid MIDI range
+    return max(0, min(127, midi_number))
+
+
+def _order_by_x(symbols: List[MusicalSymbol]) -> Tuple[List[int], np.ndarray]:
+    """
+    Stable left-to-right order of symbols
+
+    Returns:
+        Tuple of (indices that sort symbols by x, the sorted x-coordinates)
+    """
+    xs = np.fromiter((s.x for s in symbols), dtype=np.int64, count=len(symbols))
+    order = np.argsort(xs, kind='stable')
+    return order.tolist(), xs[order]
+
 
 class MidiGenerator:
     """Generates MIDI files from detected musical symbols"""
@@ -20,10 +86,23 @@ class MidiGenerator:
             time_signature: Time signature (default 4/4)
         """
         self.tempo = tempo
-        self.ticks_per_beat = ticks_per_beat
+        self.ticks_per_beat = ticks_per_beat  # also builds the duration table
         self.time_signature = time_signature or TimeSignature(4, 4)
         self.midi_file = None
 
+    @property
+    def ticks_per_beat(self) -> int:
+        """MIDI ticks per quarter note"""
+        return self._ticks_per_beat
+
+    @ticks_per_beat.setter
+    def ticks_per_beat(self, value: int) -> None:
+        # NoteDuration is a small closed set, so ticks for every duration are
+        # computed once here instead of on every note
+        self._ticks_per_beat = value
+        self._duration_ticks = {d: int(d.value * value) for d in NoteDuration}
+        self._default_ticks = self._duration_ticks[NoteDuration.QUARTER]
+
     def note_name_to_midi(self, note_name: str) -> int:
         """
         Convert note name (e.g., 'C4', 'G#5', 'Bb3') to MIDI note number
@@ -34,40 +113,7 @@ class MidiGenerator:
         Returns:
             MIDI note number (0-127)
         """
-        if not note_name or len(note_name) < 2:
-            return 60  # Default to C4
-
-        # Parse note name and octave
-        # Extract octave (last character)
-        try:
-            octave = int(note_name[-1])
-            note = note_name[:-1]
-        except ValueError:
-            octave = 4
-            note = note_name
-
-        # Base note to semitone mapping
-        base_notes = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
-
-        # Get base note
-        base_note = note[0].upper()
-        if base_note not in base_notes:
-            return 60  # Default
-
-        semitone = base_notes[base_note]
-
-        # Apply accidentals
-        accidental_part = note[1:]
-        if '#' in accidental_part:
-            semitone += accidental_part.count('#')
-        if 'b' in accidental_part:
-            semitone -= accidental_part.count('b')
-
-        # Calculate MIDI number
-        midi_number = (octave + 1) * 12 + semitone
-
-        # Clamp to valid MIDI range
-        return max(0, min(127, midi_number))
+        return _note_name_to_midi(note_name)
 
     def duration_to_ticks(self, duration: Optional[NoteDuration]) -> int:
         """
@@ -79,15 +125,28 @@ class MidiGenerator:
         Returns:
             Number of MIDI ticks
         """
-        if duration is None:
-            duration = NoteDuration.QUARTER
+        # Unknown durations (None) count as quarter notes
+        return self._duration_ticks.get(duration, self._default_ticks)
 
-        # Duration value is in quarter notes
-        # For example: WHOLE = 4.0 quarter notes, QUARTER = 1.0 quarter notes
-        quarter_notes = duration.value
-        ticks = int(quarter_notes * self.ticks_per_beat)
+    def durations_to_ticks(self, durations: List[Optional[NoteDuration]]) -> List[int]:
+        """
+        Convert many note durations to MIDI ticks at once
 
-        return ticks
+        Args:
+            durations: Note duration enums (None counts as a quarter note)
+
+        Returns:
+            Number of MIDI ticks for each duration, in order
+        """
+        table, default = self._duration_ticks, self._default_ticks
+        return [table.get(d, default) for d in durations]
+
+    def _save_midi_file(self, output_path: str) -> None:
+        """Serialize self.midi_file in memory, then write it with a single call"""
+        buffer = io.BytesIO()
+        self.midi_file.save(file=buffer)
+        with open(output_path, 'wb') as f:
+            f.write(buffer.getbuffer())
 
     def symbols_to_midi(self, symbols: List[MusicalSymbol],
                        output_path: str,
@@ -108,41 +167,40 @@ class MidiGenerator:
         track = MidiTrack()
         self.midi_file.tracks.append(track)
 
-        # Add track name
-        track.append(MetaMessage('track_name', name='Sheet Music Track', time=0))
-
-        # Set tempo
-        track.append(MetaMessage('set_tempo', tempo=mido.bpm2tempo(self.tempo), time=0))
-
-        # Set instrument
-        track.append(Message('program_change', program=instrument, time=0))
-
         # Filter only note symbols and sort by x position (temporal order)
         notes = [s for s in symbols if s.pitch is not None]
-        notes.sort(key=lambda n: n.x)
+        notes = [notes[i] for i in _order_by_x(notes)[0]]
+
+        # Convert all note names and durations up front
+        midi_notes = list(map(_note_name_to_midi, [note.pitch for note in notes]))
+        tick_durations = self.durations_to_ticks([note.note_duration for note in notes])
+
+        # Build every message in a presized list, then add them in one extend
+        messages = [None] * (2 * len(notes) + 4)
 
-        # Convert notes to MIDI messages
-        current_time = 0
+        # Add track name
+        messages[0] = MetaMessage('track_name', name='Sheet Music Track', time=0)
 
-        for note in notes:
-            # Convert note name to MIDI number
-            midi_note = self.note_name_to_midi(note.pitch)
+        # Set tempo
+        messages[1] = MetaMessage('set_tempo', tempo=mido.bpm2tempo(self.tempo), time=0)
 
-            # Get duration in ticks
-            duration_ticks = self.duration_to_ticks(note.note_duration)
+        # Set instrument
+        messages[2] = Message('program_change', program=instrument, time=0)
 
+        for i, (midi_note, duration_ticks) in enumerate(zip(midi_notes, tick_durations)):
             # Note on (velocity = 64, medium volume)
-            track.append(Message('note_on', note=midi_note, velocity=64, time=0))
+            messages[3 + 2 * i] = Message.from_bytes((_NOTE_ON, midi_note, 64), time=0)
 
             # Note off after duration
-            track.append(Message('note_off', note=midi_note, velocity=64, time=duration_ticks))
+            messages[4 + 2 * i] = Message.from_bytes((_NOTE_OFF, midi_note, 64), time=duration_ticks)
 
         # End of track
-        track.append(MetaMessage('end_of_track', time=0))
+        messages[-1] = MetaMessage('end_of_track', time=0)
+        track.extend(messages)
 
         # Save MIDI file
-        self.midi_file.save(output_path)
-        print(f"MIDI file saved to: {output_path}")
+        self._save_midi_file(output_path)
+        logger.debug("MIDI file saved to: %s", output_path)
 
         return self.midi_file
 
@@ -182,63 +240,66 @@ class MidiGenerator:
 
         track.append(Message('program_change', program=instrument, time=0))
 
-        # Separate notes and rests, keep all in chronological order
-        musical_events = []
-        for s in symbols:
-            if s.pitch is not None:
-                musical_events.append(('note', s))
-            elif s.symbol_type in [SymbolType.WHOLE_REST, SymbolType.HALF_REST,
-                                   SymbolType.QUARTER_REST, SymbolType.EIGHTH_REST]:
-                musical_events.append(('rest', s))
+        # Separate notes and rests, keep all in chronological order.
+        # Note events also carry their MIDI number and duration in ticks,
+        # converted for all notes in one pass.
+        notes = [s for s in symbols if s.pitch is not None]
+        midi_notes = map(_note_name_to_midi, [note.pitch for note in notes])
+        tick_durations = self.durations_to_ticks([note.note_duration for note in notes])
+        musical_events = [
+            ('note', note, midi_note, ticks)
+            for note, midi_note, ticks in zip(notes, midi_notes, tick_durations)
+        ]
+        musical_events.extend(
+            ('rest', s) for s in symbols
+            if s.pitch is None and s.symbol_type in _REST_TYPES
+        )
 
         # Sort by x position
-        musical_events.sort(key=lambda e: e[1].x)
+        order, xs = _order_by_x([e[1] for e in musical_events])
+        musical_events = [musical_events[i] for i in order]
 
         if not musical_events:
             # Empty track
             track.append(MetaMessage('end_of_track', time=0))
-            self.midi_file.save(output_path)
+            self._save_midi_file(output_path)
             return self.midi_file
 
-        # Group notes/rests that occur at similar x positions
-        event_groups = []
-        current_group = [musical_events[0]]
-
-        for event in musical_events[1:]:
-            if event[1].x - current_group[0][1].x <= time_threshold:
-                current_group.append(event)
-            else:
-                event_groups.append(current_group)
-                current_group = [event]
+        # Group notes/rests that occur at similar x positions: a group runs
+        # from its first event up to the last event within time_threshold of
+        # it, found by binary search on the sorted x-coordinates
+        group_ends = np.searchsorted(xs, xs + time_threshold, side='right').tolist()
 
-        event_groups.append(current_group)
-
-        # Convert grouped events to MIDI
+        event_groups = []
+        start = 0
+        while start < len(musical_events):
+            end = max(group_ends[start], start + 1)
+            event_groups.append(musical_events[start:end])
+            start = end
+
+        # Convert grouped events to MIDI, collecting the messages in a list
+        # that is added to the track in one extend
+        messages = []
         for group in event_groups:
-            notes_in_group = [e[1] for e in group if e[0] == 'note']
+            notes_in_group = [e for e in group if e[0] == 'note']
             rests_in_group = [e[1] for e in group if e[0] == 'rest']
 
             if notes_in_group:
                 # All notes in group start at the same time
-                for note in notes_in_group:
-                    midi_note = self.note_name_to_midi(note.pitch)
-                    track.append(Message('note_on', note=midi_note, velocity=64, time=0))
+                midi_notes = [e[2] for e in notes_in_group]
+                for midi_note in midi_notes:
+                    messages.append(Message.from_bytes((_NOTE_ON, midi_note, 64), time=0))
 
                 # Find the maximum duration in the group
-                max_duration = max(
-                    self.duration_to_ticks(note.note_duration) for note in notes_in_group
-                )
-
-                # Turn off all notes after the maximum duration
-                for note in notes_in_group:
-                    midi_note = self.note_name_to_midi(note.pitch)
-                    track.append(Message('note_off', note=midi_note, velocity=64, time=0))
+                max_duration = max(e[3] for e in notes_in_group)
 
-                # Set the time on the first note_off in this group
-                for i in range(len(track) - len(notes_in_group), len(track)):
-                    if track[i].type == 'note_off':
-                        track[i].time = max_duration
-                        break
+                # Turn off all notes after the maximum duration; the delay
+                # goes on the group's first note_off
+                for i, midi_note in enumerate(midi_notes):
+                    messages.append(Message.from_bytes(
+                        (_NOTE_OFF, midi_note, 64),
+                        time=0 if i else max_duration
+                    ))
 
             elif rests_in_group:
                 # Rest: just advance time with no notes playing
@@ -248,16 +309,19 @@ class MidiGenerator:
                 # Add a rest by inserting silent time
                 # We do this by adding a dummy note_on with time offset
                 # or by using a marker message
-                if len(track) > 0:
+                if messages:
                     # Add time to the last message
+                    messages[-1].time += rest_duration
+                elif len(track) > 0:
                     track[-1].time += rest_duration
 
         # End of track
-        track.append(MetaMessage('end_of_track', time=0))
+        messages.append(MetaMessage('end_of_track', time=0))
+        track.extend(messages)
 
         # Save MIDI file
-        self.midi_file.save(output_path)
-        print(f"Polyphonic MIDI file saved to: {output_path}")
+        self._save_midi_file(output_path)
+        logger.debug("Polyphonic MIDI file saved to: %s", output_path)
 
         return self.midi_file
 
@@ -1,10 +1,14 @@
 """Staff line detection for sheet music"""
 
+import bisect
+import logging
 import cv2
 import numpy as np
 from typing import List, Tuple, Optional
 from dataclasses import dataclass
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class Staff:
@@ -37,6 +41,44 @@ class StaffDetector:
         self.staves: List[Staff] = []
         self.line_thickness: Optional[int] = None
 
+    @property
+    def staves(self) -> List[Staff]:
+        """
+        Detected staves, ordered top to bottom
+
+        Assigning a new list also rebuilds parallel NumPy arrays used by the
+        lookup methods: staff_lines (N x 5), staff_tops, staff_bottoms,
+        staff_spacings, staff_x_starts and staff_x_ends. Modifying the list
+        in place does not update them, so assign a new list instead.
+        """
+        return self._staves
+
+    @staves.setter
+    def staves(self, staves: List[Staff]) -> None:
+        self._staves = staves
+        self.staff_lines = np.array([staff.lines for staff in staves],
+                                    dtype=np.int32).reshape(-1, 5)
+        self.staff_tops = self.staff_lines[:, 0]
+        self.staff_bottoms = self.staff_lines[:, -1]
+        self.staff_spacings = np.array([staff.line_spacing for staff in staves],
+                                       dtype=np.float64)
+        self.staff_x_starts = np.array([staff.x_start for staff in staves], dtype=np.int32)
+        self.staff_x_ends = np.array([staff.x_end for staff in staves], dtype=np.int32)
+
+        # Staves sorted by top edge, for binary search by y-coordinate
+        self._top_order = np.argsort(self.staff_tops, kind='stable')
+        self._sorted_tops = self.staff_tops[self._top_order].tolist()
+
+    def reset(self) -> None:
+        """
+        Clear per-image state so the detector can be reused for another image
+
+        The detector holds no other state, so reset() is all that is needed
+        between images; previously returned staff lists are left untouched.
+        """
+        self.staves = []
+        self.line_thickness = None
+
     def detect_staff_lines(self, binary_image: np.ndarray) -> List[int]:
         """
         Detect horizontal staff lines using projection profile
@@ -47,41 +89,25 @@ class StaffDetector:
         Returns:
             List of y-coordinates of detected lines
         """
-        # Calculate horizontal projection (sum of white pixels in each row)
-        horizontal_projection = np.sum(binary_image, axis=1)
-
-        # Normalize projection
-        height = binary_image.shape[0]
-        max_val = np.max(horizontal_projection)
-        if max_val > 0:
-            horizontal_projection = horizontal_projection / max_val
+        # Calculate horizontal projection (sum of white pixels in each row);
+        # cv2.reduce accumulates in int32 rather than NumPy's int64
+        horizontal_projection = cv2.reduce(binary_image, 1, cv2.REDUCE_SUM,
+                                           dtype=cv2.CV_32S).ravel()
 
         # Find peaks in the projection (these correspond to staff lines)
-        # Staff lines will have high values in the projection
-        threshold = 0.7
-        potential_lines = []
-
-        for y in range(height):
-            if horizontal_projection[y] > threshold:
-                potential_lines.append(y)
+        # Staff lines will have high values in the projection: above 70% of
+        # the maximum. For integer sums, sum > 0.7 * max exactly when
+        # sum > (7 * max) // 10, so no normalized float copy is needed.
+        max_val = int(np.max(horizontal_projection))
+        threshold = (7 * max_val) // 10
+        potential_lines = np.flatnonzero(horizontal_projection > threshold)
+        if potential_lines.size == 0:
+            return []
 
         # Group consecutive y-values and take the center of each group
-        line_positions = []
-        if potential_lines:
-            current_group = [potential_lines[0]]
-
-            for y in potential_lines[1:]:
-                if y - current_group[-1] <= 2:  # Lines within 2 pixels are same line
-                    current_group.append(y)
-                else:
-                    # Save center of current group
-                    line_positions.append(int(np.mean(current_group)))
-                    current_group = [y]
-
-            # Don't forget the last group
-            line_positions.append(int(np.mean(current_group)))
-
-        return line_positions
+        # (lines within 2 pixels are the same line)
+        breaks = np.flatnonzero(np.diff(potential_lines) > 2) + 1
+        return [int(group.mean()) for group in np.split(potential_lines, breaks)]
 
     def estimate_line_thickness(self, binary_image: np.ndarray,
                                line_positions: List[int]) -> int:
@@ -98,19 +124,13 @@ class StaffDetector:
         if not line_positions:
             return 2  # Default thickness
 
+        # Sample from middle of image
+        column = binary_image[:, binary_image.shape[1] // 2]
+
         thicknesses = []
         for y in line_positions[:5]:  # Check first few lines
-            # Count consecutive white pixels vertically around this line
-            start_y = max(0, y - 5)
-            end_y = min(binary_image.shape[0], y + 5)
-
-            # Sample from middle of image
-            x = binary_image.shape[1] // 2
-
-            thickness = 0
-            for check_y in range(start_y, end_y):
-                if binary_image[check_y, x] > 0:
-                    thickness += 1
+            # Count white pixels vertically around this line
+            thickness = np.count_nonzero(column[max(0, y - 5):y + 5])
 
             if thickness > 0:
                 thicknesses.append(thickness)
@@ -137,47 +157,48 @@ class StaffDetector:
         if len(line_positions) < 5:
             return []
 
+        # Spacing statistics for every window of 5 consecutive lines
+        windows = np.lib.stride_tricks.sliding_window_view(np.diff(line_positions), 4)
+        avg_spacings = windows.mean(axis=1)
+        spacing_stds = windows.std(axis=1)
+
+        # Check if spacing is consistent (should be for a real staff)
+        consistent = spacing_stds < avg_spacings * 0.3  # 30% tolerance
+
         staves = []
-        i = 0
+        next_start = 0
+        for i in np.flatnonzero(consistent):
+            if i < next_start:
+                continue  # Line already belongs to the previous staff
 
-        while i <= len(line_positions) - 5:
-            # Take next 5 lines
             staff_lines = line_positions[i:i+5]
 
-            # Calculate spacing between these lines
-            spacings = [staff_lines[j+1] - staff_lines[j] for j in range(4)]
-            avg_spacing = np.mean(spacings)
-            spacing_std = np.std(spacings)
-
-            # Check if spacing is consistent (should be for a real staff)
-            if spacing_std < avg_spacing * 0.3:  # 30% tolerance
-                # Find x extent of this staff
-                staff_top = staff_lines[0]
-                staff_bottom = staff_lines[4]
-
-                # Look for where staff starts and ends horizontally
-                staff_region = binary_image[staff_top:staff_bottom+1, :]
-                horizontal_sum = np.sum(staff_region, axis=0)
-
-                # Find first and last positions with significant content
-                threshold = np.max(horizontal_sum) * 0.1
-                x_positions = np.where(horizontal_sum > threshold)[0]
-
-                if len(x_positions) > 0:
-                    x_start = int(x_positions[0])
-                    x_end = int(x_positions[-1])
-
-                    staff = Staff(
-                        lines=staff_lines,
-                        line_spacing=avg_spacing,
-                        x_start=x_start,
-                        x_end=x_end
-                    )
-                    staves.append(staff)
-
-                i += 5  # Move to next potential staff
-            else:
-                i += 1  # Try next line
+            # Find x extent of this staff
+            staff_top = staff_lines[0]
+            staff_bottom = staff_lines[4]
+
+            # Look for where staff starts and ends horizontally
+            staff_region = binary_image[staff_top:staff_bottom+1, :]
+            horizontal_sum = cv2.reduce(staff_region, 0, cv2.REDUCE_SUM,
+                                        dtype=cv2.CV_32S).ravel()
+
+            # Find first and last positions with significant content
+            threshold = np.max(horizontal_sum) * 0.1
+            x_positions = np.where(horizontal_sum > threshold)[0]
+
+            if len(x_positions) > 0:
+                x_start = int(x_positions[0])
+                x_end = int(x_positions[-1])
+
+                staff = Staff(
+                    lines=staff_lines,
+                    line_spacing=avg_spacings[i],
+                    x_start=x_start,
+                    x_end=x_end
+                )
+                staves.append(staff)
+
+            next_start = i + 5  # Move to next potential staff
 
         self.staves = staves
         return staves
@@ -201,34 +222,40 @@ class StaffDetector:
         # Group into staves
         staves = self.group_lines_into_staves(line_positions, binary_image)
 
-        print(f"Detected {len(staves)} staff/staves")
+        logger.debug("Detected %d staff/staves", len(staves))
         for idx, staff in enumerate(staves):
-            print(f"  Staff {idx+1}: lines at {staff.lines}, "
-                  f"spacing={staff.line_spacing:.1f}px")
+            logger.debug("  Staff %d: lines at %s, spacing=%.1fpx",
+                         idx + 1, staff.lines, staff.line_spacing)
 
         return staves
 
-    def remove_staff_lines(self, binary_image: np.ndarray) -> np.ndarray:
+    def remove_staff_lines(self, binary_image: np.ndarray,
+                           inplace: bool = False) -> np.ndarray:
         """
         Remove staff lines from image to isolate symbols
 
         Args:
             binary_image: Binary image with staff lines
+            inplace: Erase the lines in binary_image itself instead of a copy,
+                    for callers that no longer need the original
 
         Returns:
             Image with staff lines removed
         """
-        result = binary_image.copy()
+        result = binary_image if inplace else binary_image.copy()
 
         if self.line_thickness is None:
             self.line_thickness = 2
 
-        for staff in self.staves:
-            for line_y in staff.lines:
+        # Row band [top, bottom) around every line of every staff
+        bands = self.staff_lines[:, :, None] + [-self.line_thickness, self.line_thickness + 1]
+        bands = np.clip(bands, 0, binary_image.shape[0]).tolist()
+
+        for staff_bands, x_start, x_end in zip(bands, self.staff_x_starts.tolist(),
+                                               self.staff_x_ends.tolist()):
+            for top, bottom in staff_bands:
                 # Remove horizontal line
-                top = max(0, line_y - self.line_thickness)
-                bottom = min(binary_image.shape[0], line_y + self.line_thickness + 1)
-                result[top:bottom, staff.x_start:staff.x_end] = 0
+                result[top:bottom, x_start:x_end] = 0
 
         return result
 
@@ -245,8 +272,12 @@ class StaffDetector:
             - Space positions: 0.5, 1.5, 2.5, 3.5 for spaces between lines
             - None if not on a staff
         """
-        for staff in self.staves:
-            if staff.top <= y <= staff.bottom:
+        # Staves do not overlap, so only the last one starting at or above
+        # y can contain it
+        i = bisect.bisect_right(self._sorted_tops, y) - 1
+        if i >= 0:
+            staff = self.staves[self._top_order[i]]
+            if y <= staff.bottom:
                 # Normalize position within staff
                 relative_y = y - staff.top
                 position = relative_y / staff.line_spacing
@@ -254,3 +285,32 @@ class StaffDetector:
                 return staff, position
 
         return None, None
+
+    def get_staff_positions(self, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Batch version of get_staff_position for many y-coordinates
+
+        Args:
+            ys: Y-coordinates
+
+        Returns:
+            Tuple of (staff indices into self.staves, positions within the
+            staff); y-coordinates not on a staff get index -1 and position NaN
+        """
+        ys = np.asarray(ys)
+        if not self.staves:
+            return np.full(ys.shape, -1), np.full(ys.shape, np.nan)
+
+        order = self._top_order
+        tops = self.staff_tops[order]
+
+        # Last staff starting at or above each y, then check y is above its bottom
+        idx = np.searchsorted(tops, ys, side='right') - 1
+        clipped = order[np.maximum(idx, 0)]
+        on_staff = (idx >= 0) & (ys <= self.staff_bottoms[clipped])
+
+        # Normalize position within staff
+        positions = np.where(on_staff,
+                             (ys - self.staff_tops[clipped]) / self.staff_spacings[clipped],
+                             np.nan)
+        return np.where(on_staff, clipped, -1), positions
@@ -1,11 +1,18 @@
 """Musical symbol detection and recognition"""
 
+import logging
+import operator
 import cv2
 import numpy as np
 from typing import List, Tuple, Optional, Dict
 from dataclasses import dataclass
 from enum import Enum
 
+logger = logging.getLogger(__name__)
+
+# Sort key for symbols, left to right
+_symbol_x = operator.attrgetter('x')
+
 
 class SymbolType(Enum):
     """Types of musical symbols"""
@@ -97,6 +104,7 @@ class MusicalSymbol:
     beam_group_id: Optional[int] = None  # ID of beam group this note belongs to
     time_signature: Optional[TimeSignature] = None  # For time signature symbols
     key_signature: Optional[KeySignature] = None  # For key signature symbols
+    in_key_signature: bool = False  # Accidental that is part of the key signature
 
     @property
     def center_x(self) -> int:
@@ -107,11 +115,100 @@ class MusicalSymbol:
         return self.y + self.height // 2
 
 
+def _line_kernel(width: int, height: int) -> np.ndarray:
+    """Read-only rectangular structuring element, built once at import"""
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (width, height))
+    kernel.flags.writeable = False
+    return kernel
+
+
+# Vertical kernel for stems and horizontal kernel for beams
+_STEM_KERNEL = _line_kernel(1, 15)
+_BEAM_KERNEL = _line_kernel(20, 1)
+
+
+def _outer_contours(image: np.ndarray) -> Tuple[list, np.ndarray, np.ndarray]:
+    """
+    Find the outer contours of an image and measure them
+
+    Args:
+        image: Binary image
+
+    Returns:
+        Tuple of (contours, contour areas, (N, 4) array of bounding
+        rectangles as x, y, width, height)
+    """
+    contours, _ = cv2.findContours(image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    areas = np.array([cv2.contourArea(contour) for contour in contours], dtype=np.float64)
+    rects = np.array([cv2.boundingRect(contour) for contour in contours],
+                     dtype=int).reshape(-1, 4)
+    return contours, areas, rects
+
+
+# Pitch class names indexed by MIDI number modulo 12
+_NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+
+# Note name with octave for every MIDI number, e.g. _PITCH_NAMES[60] == 'C4'
+_PITCH_NAMES = tuple(f"{_NOTE_NAMES[m % 12]}{(m // 12) - 1}" for m in range(128))
+
+
+def _pitch_name(midi_note: int) -> str:
+    """Note name with octave for a MIDI number, formatted if outside 0-127"""
+    if 0 <= midi_note < 128:
+        return _PITCH_NAMES[midi_note]
+    return f"{_NOTE_NAMES[midi_note % 12]}{(midi_note // 12) - 1}"
+
+
+# Pitch name suffix written for each accidental that alters a note
+_ACCIDENTAL_SUFFIXES = {
+    Accidental.SHARP: '#',
+    Accidental.FLAT: 'b',
+    Accidental.DOUBLE_SHARP: '##',
+    Accidental.DOUBLE_FLAT: 'bb',
+}
+
+
+def _box_densities(image: np.ndarray, rects: np.ndarray) -> np.ndarray:
+    """
+    Fraction of non-zero pixels inside each of a set of boxes
+
+    Uses one summed-area table for the whole image, so each box costs
+    four lookups instead of a pass over its pixels.
+
+    Args:
+        image: Single-channel image
+        rects: (N, 4) array of (x, y, width, height) boxes
+
+    Returns:
+        Array of N densities
+    """
+    _, mask = cv2.threshold(image, 0, 1, cv2.THRESH_BINARY)
+    table = cv2.integral(mask)
+    xs, ys, ws, hs = rects.T
+    sums = (table[ys + hs, xs + ws] - table[ys, xs + ws]
+            - table[ys + hs, xs] + table[ys, xs])
+    return sums / (ws * hs)
+
+
+def _box_sum(table: np.ndarray, x: int, y: int, w: int, h: int) -> float:
+    """Sum of the pixels inside a box, read from the image's summed-area table"""
+    return table[y + h, x + w] - table[y, x + w] - table[y + h, x] + table[y, x]
+
+
 class SymbolDetector:
     """Detects and classifies musical symbols"""
 
     def __init__(self, staff_detector=None):
         self.staff_detector = staff_detector
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clear per-image detection results so the detector can be reused
+
+        The staff detector link is kept. Result lists are replaced rather than
+        cleared in place, so lists returned by earlier calls stay valid.
+        """
         self.symbols: List[MusicalSymbol] = []
         self.note_heads: List[MusicalSymbol] = []
         self.accidentals: List[MusicalSymbol] = []
@@ -119,6 +216,30 @@ class SymbolDetector:
         self.beams: List[Tuple[int, int, int, int]] = []
         self.time_signature: Optional[TimeSignature] = TimeSignature(4, 4)  # Default 4/4
         self.key_signature: Optional[KeySignature] = KeySignature(0, 0)  # Default C major
+        # (image, _outer_contours(image)) shared by the detectors during detect_symbols
+        self._shared_contours = None
+
+    def _contours_of(self, image: np.ndarray) -> Tuple[list, np.ndarray, np.ndarray]:
+        """Outer contours of image, reusing the ones found by detect_symbols"""
+        if self._shared_contours is not None and self._shared_contours[0] is image:
+            return self._shared_contours[1]
+        return _outer_contours(image)
+
+    def _staff_positions(self, rects: np.ndarray) -> List[Optional[float]]:
+        """
+        Staff positions of the vertical centers of a set of boxes
+
+        Args:
+            rects: (N, 4) array of (x, y, width, height) boxes
+
+        Returns:
+            Position within the staff for each box, None if not on a staff
+        """
+        if not (self.staff_detector and self.staff_detector.staves):
+            return [None] * len(rects)
+        center_ys = rects[:, 1] + rects[:, 3] // 2
+        _, positions = self.staff_detector.get_staff_positions(center_ys)
+        return [None if np.isnan(p) else p for p in positions]
 
     def detect_note_heads(self, image_no_staff: np.ndarray,
                          binary_image: np.ndarray) -> List[MusicalSymbol]:
@@ -134,69 +255,64 @@ class SymbolDetector:
         """
         note_heads = []
 
-        # Find contours in the image without staff lines
-        contours, _ = cv2.findContours(
-            image_no_staff, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
-        )
+        # Find contours in the image without staff lines, measured up front
+        # so the size and shape checks run as array operations; circularity
+        # is only computed for survivors
+        contours, areas, rects = self._contours_of(image_no_staff)
 
-        for contour in contours:
-            area = cv2.contourArea(contour)
+        if not contours:
+            self.note_heads = note_heads
+            return note_heads
 
-            # Note heads typically have a certain size range
-            if area < 10 or area > 1000:
-                continue
+        # Note heads are roughly circular/oval (0.4 to 2.5 aspect ratio)
+        aspect_ratios = rects[:, 2] / rects[:, 3]
 
-            # Get bounding rectangle
-            x, y, w, h = cv2.boundingRect(contour)
+        # Note heads typically have a certain size range
+        candidates = np.flatnonzero(
+            (areas >= 10) & (areas <= 1000) &
+            (aspect_ratios >= 0.4) & (aspect_ratios <= 2.5)
+        )
+
+        # Calculate circularity
+        perimeters = np.array([cv2.arcLength(contours[i], True) for i in candidates])
+        candidates = candidates[perimeters > 0]
+        perimeters = perimeters[perimeters > 0]
+        circularity = 4 * np.pi * areas[candidates] / (perimeters * perimeters)
+
+        # Circular shapes have circularity close to 1
+        candidates = candidates[circularity > 0.3]
+        if candidates.size == 0:
+            self.note_heads = note_heads
+            return note_heads
+
+        # Determine if filled or hollow by checking pixel density.
+        # Filled note heads (quarter notes, eighth notes, etc.) will have
+        # higher density; hollow ones are checked in the original image
+        # with staff lines
+        candidate_rects = rects[candidates]
+        is_note = _box_densities(image_no_staff, candidate_rects) > 0.5
+        if not is_note.all():
+            hollow = ~is_note
+            is_note[hollow] = _box_densities(binary_image, candidate_rects[hollow]) > 0.2
+
+        # Sort note heads by x position (left to right) before building them
+        note_rects = candidate_rects[is_note]
+        note_rects = note_rects[np.argsort(note_rects[:, 0], kind='stable')]
+
+        # Get staff positions
+        staff_positions = self._staff_positions(note_rects)
+
+        for (x, y, w, h), staff_pos in zip(note_rects.tolist(), staff_positions):
+            note_head = MusicalSymbol(
+                symbol_type=SymbolType.NOTE_HEAD,
+                x=x,
+                y=y,
+                width=w,
+                height=h,
+                staff_position=staff_pos
+            )
+            note_heads.append(note_head)
 
-            # Note heads are roughly circular/oval
-            aspect_ratio = w / h if h > 0 else 0
-
-            # Check if shape is roughly circular (0.5 to 2.0 aspect ratio)
-            if 0.4 <= aspect_ratio <= 2.5:
-                # Calculate circularity
-                perimeter = cv2.arcLength(contour, True)
-                if perimeter > 0:
-                    circularity = 4 * np.pi * area / (perimeter * perimeter)
-
-                    # Circular shapes have circularity close to 1
-                    if circularity > 0.3:
-                        center_y = y + h // 2
-
-                        # Get staff position
-                        staff_pos = None
-                        if self.staff_detector and self.staff_detector.staves:
-                            _, staff_pos = self.staff_detector.get_staff_position(center_y)
-
-                        # Determine if filled or hollow by checking pixel density
-                        roi = image_no_staff[y:y+h, x:x+w]
-                        pixel_density = np.sum(roi > 0) / (w * h) if (w * h) > 0 else 0
-
-                        # Filled note heads (quarter notes, eighth notes, etc.)
-                        # will have higher density
-                        if pixel_density > 0.5:
-                            symbol_type = SymbolType.NOTE_HEAD
-                        else:
-                            # Check original image with staff for hollow notes
-                            roi_orig = binary_image[y:y+h, x:x+w]
-                            density_orig = np.sum(roi_orig > 0) / (w * h) if (w * h) > 0 else 0
-                            if density_orig > 0.2:
-                                symbol_type = SymbolType.NOTE_HEAD
-                            else:
-                                continue
-
-                        note_head = MusicalSymbol(
-                            symbol_type=symbol_type,
-                            x=x,
-                            y=y,
-                            width=w,
-                            height=h,
-                            staff_position=staff_pos
-                        )
-                        note_heads.append(note_head)
-
-        # Sort note heads by x position (left to right)
-        note_heads.sort(key=lambda n: n.x)
         self.note_heads = note_heads
 
         return note_heads
@@ -211,31 +327,24 @@ class SymbolDetector:
         Returns:
             List of stem rectangles (x, y, width, height)
         """
-        stems = []
-
         # Use morphological operations to detect vertical lines
-        # Create vertical kernel
-        kernel_height = 15
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, kernel_height))
-
-        # Detect vertical lines
-        vertical_lines = cv2.morphologyEx(image_no_staff, cv2.MORPH_OPEN, vertical_kernel)
+        vertical_lines = cv2.morphologyEx(image_no_staff, cv2.MORPH_OPEN, _STEM_KERNEL)
 
         # Find contours of vertical lines
         contours, _ = cv2.findContours(
             vertical_lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
         )
 
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
+        if not contours:
+            return []
+
+        rects = np.array([cv2.boundingRect(contour) for contour in contours])
+        widths, heights = rects[:, 2], rects[:, 3]
 
-            # Stems are thin and tall
-            if w <= 5 and h >= 10:
-                aspect_ratio = h / w if w > 0 else 0
-                if aspect_ratio >= 3:
-                    stems.append((x, y, w, h))
+        # Stems are thin and tall
+        is_stem = (widths <= 5) & (heights >= 10) & (heights >= 3 * widths)
 
-        return stems
+        return [tuple(rect) for rect in rects[is_stem].tolist()]
 
     def associate_stems_with_heads(self, note_heads: List[MusicalSymbol],
                                    stems: List[Tuple[int, int, int, int]]) -> None:
@@ -246,22 +355,23 @@ class SymbolDetector:
             note_heads: List of detected note heads
             stems: List of detected stems (x, y, width, height)
         """
-        for note_head in note_heads:
-            has_stem = False
-
-            # Check if any stem is near this note head
-            for stem_x, stem_y, stem_w, stem_h in stems:
-                # Stem should be close to note head horizontally
-                if abs(stem_x - note_head.x) < note_head.width:
-                    # Stem should connect vertically
-                    stem_bottom = stem_y + stem_h
-                    stem_top = stem_y
-
-                    if (stem_top <= note_head.center_y <= stem_bottom or
-                        note_head.y <= stem_bottom <= note_head.y + note_head.height):
-                        has_stem = True
-                        break
-
+        if not note_heads:
+            return
+
+        # Test every note head against every stem at once
+        heads = np.array([(n.x, n.y, n.width, n.height) for n in note_heads]).reshape(-1, 4)
+        head_x, head_y, head_w, head_h = (col[:, None] for col in heads.T)
+        head_center_y = head_y + head_h // 2
+        stem_x, stem_top, _, stem_h = np.array(stems, dtype=int).reshape(-1, 4).T
+        stem_bottom = stem_top + stem_h
+
+        # Stem should be close to note head horizontally and connect vertically
+        near = np.abs(stem_x - head_x) < head_w
+        connects = (((stem_top <= head_center_y) & (head_center_y <= stem_bottom)) |
+                    ((head_y <= stem_bottom) & (stem_bottom <= head_y + head_h)))
+        has_stems = (near & connects).any(axis=1).tolist()
+
+        for note_head, has_stem in zip(note_heads, has_stems):
             # Determine note type based on stem
             if has_stem:
                 # For now, assume quarter note (would need more analysis for eighth, etc.)
@@ -291,25 +401,27 @@ class SymbolDetector:
         accidentals = []
 
         # Find contours
-        contours, _ = cv2.findContours(
-            image_no_staff, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
-        )
+        _, areas, rects = self._contours_of(image_no_staff)
 
-        for contour in contours:
-            area = cv2.contourArea(contour)
+        # Summed-area table of image_no_staff, built when first needed
+        value_table = None
 
-            # Accidentals have specific size range
-            if area < 20 or area > 500:
-                continue
+        # Accidentals have specific size range, and every accidental shape
+        # below is taller than it is wide (aspect ratio between 1.5 and 4)
+        widths = rects[:, 2]
+        aspect_ratios = np.divide(rects[:, 3], widths, out=np.zeros(len(rects)),
+                                  where=widths > 0)
+        candidates = ((areas >= 20) & (areas <= 500) &
+                      (aspect_ratios > 1.5) & (aspect_ratios < 4.0))
+        rects = rects[candidates]
+        aspect_ratios = aspect_ratios[candidates]
 
-            x, y, w, h = cv2.boundingRect(contour)
-            aspect_ratio = h / w if w > 0 else 0
+        # Get staff positions
+        staff_positions = self._staff_positions(rects)
 
-            # Get staff position
-            center_y = y + h // 2
-            staff_pos = None
-            if self.staff_detector and self.staff_detector.staves:
-                _, staff_pos = self.staff_detector.get_staff_position(center_y)
+        for (x, y, w, h), aspect_ratio, staff_pos in zip(rects.tolist(),
+                                                         aspect_ratios.tolist(),
+                                                         staff_positions):
 
             # Sharp: tall and narrow (aspect ratio > 2)
             if aspect_ratio > 2.0 and aspect_ratio < 4.0:
@@ -318,11 +430,9 @@ class SymbolDetector:
                 horizontal_proj = np.sum(roi, axis=1)
 
                 # Sharp should have strong horizontal components
-                peaks = 0
-                threshold = np.max(horizontal_proj) * 0.5 if np.max(horizontal_proj) > 0 else 0
-                for val in horizontal_proj:
-                    if val > threshold:
-                        peaks += 1
+                max_val = horizontal_proj.max()
+                threshold = max_val * 0.5 if max_val > 0 else 0
+                peaks = np.count_nonzero(horizontal_proj > threshold)
 
                 if peaks >= 2:  # Sharp has at least 2 horizontal lines
                     accidental = MusicalSymbol(
@@ -336,10 +446,14 @@ class SymbolDetector:
             # Flat: tall with rounded bottom (aspect ratio > 1.5)
             elif aspect_ratio > 1.5 and aspect_ratio < 3.0:
                 # Flat has more pixels in bottom half
-                roi = image_no_staff[y:y+h, x:x+w]
+                if value_table is None:
+                    # float64 sums stay exact where int32 could overflow
+                    value_table = cv2.integral(image_no_staff, sdepth=cv2.CV_64F)
                 mid_h = h // 2
-                top_density = np.sum(roi[:mid_h, :]) / (w * mid_h) if (w * mid_h) > 0 else 0
-                bottom_density = np.sum(roi[mid_h:, :]) / (w * (h - mid_h)) if (w * (h - mid_h)) > 0 else 0
+                top_sum = _box_sum(value_table, x, y, w, mid_h)
+                bottom_sum = _box_sum(value_table, x, y + mid_h, w, h - mid_h)
+                top_density = top_sum / (w * mid_h) if (w * mid_h) > 0 else 0
+                bottom_density = bottom_sum / (w * (h - mid_h)) if (w * (h - mid_h)) > 0 else 0
 
                 if bottom_density > top_density * 1.2:
                     accidental = MusicalSymbol(
@@ -361,6 +475,15 @@ class SymbolDetector:
                 )
                 accidentals.append(accidental)
 
+        # Accidentals in the key signature apply to the whole piece, not to
+        # the note that happens to follow them
+        region_bounds = self._key_signature_region()
+        if region_bounds is not None:
+            x_start, x_end, y_start, y_end = region_bounds
+            for accidental in accidentals:
+                accidental.in_key_signature = (x_start <= accidental.center_x < x_end and
+                                               y_start <= accidental.center_y < y_end)
+
         self.accidentals = accidentals
         return accidentals
 
@@ -376,25 +499,17 @@ class SymbolDetector:
         """
         rests = []
 
-        contours, _ = cv2.findContours(
-            image_no_staff, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
-        )
-
-        for contour in contours:
-            area = cv2.contourArea(contour)
+        _, areas, rects = self._contours_of(image_no_staff)
 
-            # Rests have specific size ranges
-            if area < 15 or area > 800:
-                continue
+        # Rests have specific size ranges
+        in_range = (areas >= 15) & (areas <= 800)
+        rects = rects[in_range]
+        staff_positions = self._staff_positions(rects)
 
-            x, y, w, h = cv2.boundingRect(contour)
+        for (x, y, w, h), area, staff_pos in zip(rects.tolist(), areas[in_range].tolist(),
+                                                 staff_positions):
             aspect_ratio = h / w if w > 0 else 0
 
-            center_y = y + h // 2
-            staff_pos = None
-            if self.staff_detector and self.staff_detector.staves:
-                _, staff_pos = self.staff_detector.get_staff_position(center_y)
-
             # Whole rest: small horizontal rectangle
             if 0.2 <= aspect_ratio <= 0.6 and area < 200:
                 rest = MusicalSymbol(
@@ -451,12 +566,8 @@ class SymbolDetector:
         """
         beams = []
 
-        # Create horizontal kernel to detect beams
-        kernel_width = 20
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_width, 1))
-
         # Detect horizontal lines (potential beams)
-        horizontal_lines = cv2.morphologyEx(image_no_staff, cv2.MORPH_OPEN, horizontal_kernel)
+        horizontal_lines = cv2.morphologyEx(image_no_staff, cv2.MORPH_OPEN, _BEAM_KERNEL)
 
         # Find contours
         contours, _ = cv2.findContours(
@@ -484,60 +595,67 @@ class SymbolDetector:
             note_heads: List of detected note heads
             beams: List of detected beams
         """
-        beam_group_id = 0
-
-        for beam_x, beam_y, beam_w, beam_h in beams:
-            # Find notes that are connected by this beam
-            beamed_notes = []
-
-            for note in note_heads:
-                # Check if note stem connects to this beam
-                # Beam should be horizontally aligned with note x position
-                if beam_x <= note.center_x <= beam_x + beam_w:
-                    # Check vertical proximity
-                    if abs(note.y - beam_y) < 40 or abs((note.y + note.height) - beam_y) < 40:
-                        beamed_notes.append(note)
-
-            # Mark all these notes as beamed with same group ID
-            if len(beamed_notes) >= 2:
-                for note in beamed_notes:
-                    note.is_beamed = True
-                    note.beam_group_id = beam_group_id
-                    # Beamed notes are at least eighth notes
-                    if note.note_duration == NoteDuration.QUARTER:
-                        note.symbol_type = SymbolType.EIGHTH_NOTE
-                        note.note_duration = NoteDuration.EIGHTH
-
-                beam_group_id += 1
+        if not beams or not note_heads:
+            return
+
+        notes = np.array([(n.center_x, n.y, n.y + n.height) for n in note_heads])
+        beam_x, beam_y, beam_w, _ = np.array(beams).T[:, :, None]
+
+        # Find notes that are connected by each beam (rows are beams):
+        # horizontally within the beam and vertically close to it
+        in_x = (beam_x <= notes[:, 0]) & (notes[:, 0] <= beam_x + beam_w)
+        close_y = ((np.abs(notes[:, 1] - beam_y) < 40) |
+                   (np.abs(notes[:, 2] - beam_y) < 40))
+        connected = in_x & close_y
+
+        # Beams joining at least two notes form groups, numbered in beam
+        # order; a note on several beams keeps the last group's ID
+        connected = connected[connected.sum(axis=1) >= 2]
+        group_ids = np.where(connected, np.arange(len(connected))[:, None], -1)
+        group_ids = group_ids.max(axis=0, initial=-1)
+
+        for note, group_id in zip(note_heads, group_ids.tolist()):
+            if group_id < 0:
+                continue
+            note.is_beamed = True
+            note.beam_group_id = group_id
+            # Beamed notes are at least eighth notes
+            if note.note_duration == NoteDuration.QUARTER:
+                note.symbol_type = SymbolType.EIGHTH_NOTE
+                note.note_duration = NoteDuration.EIGHTH
 
     def apply_accidentals_to_notes(self, note_heads: List[MusicalSymbol],
                                    accidentals: List[MusicalSymbol]) -> None:
         """
         Apply detected accidentals to nearby notes
 
+        Accidentals flagged as part of the key signature are skipped.
+
         Args:
             note_heads: List of note heads
             accidentals: List of detected accidentals
         """
-        for accidental in accidentals:
-            # Find the note immediately to the right of this accidental
-            closest_note = None
-            min_distance = float('inf')
+        accidentals = [a for a in accidentals if not a.in_key_signature]
+        if not accidentals or not note_heads:
+            return
 
-            for note in note_heads:
-                # Accidental should be to the left of the note
-                if note.x > accidental.x:
-                    distance = note.x - accidental.x
-                    # Should be close horizontally and vertically aligned
-                    vertical_diff = abs(note.center_y - accidental.center_y)
+        notes = np.array([(n.x, n.center_y) for n in note_heads])
+        marks = np.array([(a.x, a.center_y) for a in accidentals])
 
-                    if distance < 30 and vertical_diff < 15:
-                        if distance < min_distance:
-                            min_distance = distance
-                            closest_note = note
+        # Accidental should be to the left of the note, close horizontally
+        # and vertically aligned; rows are accidentals, columns are notes
+        distances = notes[None, :, 0] - marks[:, None, 0]
+        vertical_diffs = np.abs(notes[None, :, 1] - marks[:, None, 1])
+        in_reach = (distances > 0) & (distances < 30) & (vertical_diffs < 15)
 
-            if closest_note:
-                closest_note.accidental = accidental.accidental
+        # Find the note immediately to the right of each accidental (30 is
+        # beyond reach, so argmin only picks it when nothing is in reach)
+        closest = np.where(in_reach, distances, 30).argmin(axis=1)
+
+        for accidental, note_index, found in zip(accidentals, closest.tolist(),
+                                                 in_reach.any(axis=1).tolist()):
+            if found:
+                note_heads[note_index].accidental = accidental.accidental
 
     def detect_time_signature(self, binary_image: np.ndarray) -> Optional[TimeSignature]:
         """
@@ -582,6 +700,24 @@ class SymbolDetector:
 
         return self.time_signature
 
+    def _key_signature_region(self) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Bounds of the key signature search region on the first staff
+
+        Returns:
+            Tuple of (x_start, x_end, y_start, y_end), or None without staves
+        """
+        if not self.staff_detector or not self.staff_detector.staves:
+            return None
+
+        first_staff = self.staff_detector.staves[0]
+
+        # Search region after clef but before notes
+        return (first_staff.x_start + 20,
+                min(first_staff.x_start + 200, first_staff.x_end),
+                first_staff.top,
+                first_staff.bottom)
+
     def detect_key_signature(self, binary_image: np.ndarray) -> Optional[KeySignature]:
         """
         Detect key signature by counting sharps or flats at staff beginning
@@ -592,16 +728,11 @@ class SymbolDetector:
         Returns:
             Detected KeySignature
         """
-        if not self.staff_detector or not self.staff_detector.staves:
+        region_bounds = self._key_signature_region()
+        if region_bounds is None:
             return KeySignature(0, 0)
 
-        first_staff = self.staff_detector.staves[0]
-
-        # Search region after clef but before notes
-        search_x_start = first_staff.x_start + 20
-        search_x_end = min(first_staff.x_start + 200, first_staff.x_end)
-        search_y_start = first_staff.top
-        search_y_end = first_staff.bottom
+        search_x_start, search_x_end, search_y_start, search_y_end = region_bounds
 
         # Extract region
         if (search_x_end > search_x_start and search_y_end > search_y_start and
@@ -610,28 +741,20 @@ class SymbolDetector:
 
             region = binary_image[search_y_start:search_y_end, search_x_start:search_x_end]
 
-            # Count sharps and flats in key signature region
-            sharps = 0
-            flats = 0
-
-            # Detect accidentals in this region
-            temp_symbols = []
-            contours, _ = cv2.findContours(
-                region, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
-            )
-
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if 20 < area < 300:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    aspect_ratio = h / w if w > 0 else 0
-
-                    # Count sharps (tall narrow symbols)
-                    if aspect_ratio > 2.0 and aspect_ratio < 4.0:
-                        sharps += 1
-                    # Count flats (tall with rounded bottom)
-                    elif aspect_ratio > 1.5 and aspect_ratio < 3.0:
-                        flats += 1
+            # Measure the symbols in this region
+            _, areas, rects = _outer_contours(region)
+            widths = rects[:, 2]
+            aspect_ratios = np.divide(rects[:, 3], widths, out=np.zeros(len(rects)),
+                                      where=widths > 0)
+            aspect_ratios = aspect_ratios[(areas > 20) & (areas < 300)]
+
+            # Count sharps (tall narrow symbols)
+            is_sharp = (aspect_ratios > 2.0) & (aspect_ratios < 4.0)
+            sharps = int(np.count_nonzero(is_sharp))
+            # Count flats (tall with rounded bottom)
+            flats = int(np.count_nonzero(
+                ~is_sharp & (aspect_ratios > 1.5) & (aspect_ratios < 3.0)
+            ))
 
             self.key_signature = KeySignature(sharps, flats)
         else:
@@ -687,15 +810,40 @@ class SymbolDetector:
             midi_note = 43 + offset
 
         # Convert MIDI number to note name
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        octave = (midi_note // 12) - 1
-        note_name = note_names[midi_note % 12]
+        return _pitch_name(midi_note)
 
-        return f"{note_name}{octave}"
+    def calculate_pitches(self, note_heads: List[MusicalSymbol],
+                          clef: str = 'treble') -> List[str]:
+        """
+        Calculate the pitches of several notes at once
+
+        Same mapping as calculate_pitch, with the position arithmetic done
+        for all notes in one array pass.
+
+        Args:
+            note_heads: Note head symbols with staff positions
+            clef: Type of clef ('treble' or 'bass')
+
+        Returns:
+            Note names with octave, in the order of note_heads
+        """
+        # Notes off the staff get a placeholder position and the default pitch
+        positions = np.array([4 if n.staff_position is None else n.staff_position
+                              for n in note_heads], dtype=np.float64)
+
+        # Position 4 (bottom line) is E4 = 64 in treble clef, G2 = 43 in bass clef
+        bottom_line_midi = 64 if clef == 'treble' else 43
+        offsets = np.rint((4 - positions) * 2).astype(int)
+        midi_notes = (bottom_line_midi + offsets).tolist()
+
+        return [
+            'C4' if n.staff_position is None else _pitch_name(midi_note)
+            for n, midi_note in zip(note_heads, midi_notes)
+        ]
 
     def detect_symbols(self, binary_image: np.ndarray,
                       image_no_staff: np.ndarray,
-                      clef: str = 'treble') -> List[MusicalSymbol]:
+                      clef: str = 'treble', x_offset: int = 0) -> List[MusicalSymbol]:
         """
         Complete symbol detection pipeline
 
@@ -703,6 +851,8 @@ class SymbolDetector:
             binary_image: Original binary image with staff lines
             image_no_staff: Image with staff lines removed
             clef: Clef type for pitch calculation
+            x_offset: Added to the x-coordinate of every returned symbol, e.g.
+                     to place a page after earlier ones in a multi-page score
 
         Returns:
             List of detected and classified symbols
@@ -711,34 +861,40 @@ class SymbolDetector:
         self.detect_time_signature(binary_image)
         self.detect_key_signature(binary_image)
 
-        print(f"Time signature: {self.time_signature}")
-        print(f"Key signature: {self.key_signature}")
+        logger.debug("Time signature: %s", self.time_signature)
+        logger.debug("Key signature: %s", self.key_signature)
 
-        # Detect note heads
-        note_heads = self.detect_note_heads(image_no_staff, binary_image)
+        # The note head, accidental and rest detectors all work on the outer
+        # contours of the staff-free image; find them once for all three
+        self._shared_contours = (image_no_staff, _outer_contours(image_no_staff))
+        try:
+            # Detect note heads
+            note_heads = self.detect_note_heads(image_no_staff, binary_image)
 
-        # Detect stems
-        stems = self.detect_stems(image_no_staff)
+            # Detect stems
+            stems = self.detect_stems(image_no_staff)
 
-        # Associate stems with note heads
-        self.associate_stems_with_heads(note_heads, stems)
+            # Associate stems with note heads
+            self.associate_stems_with_heads(note_heads, stems)
 
-        # Detect beams and associate with notes
-        beams = self.detect_beams(image_no_staff)
-        self.associate_beams_with_notes(note_heads, beams)
+            # Detect beams and associate with notes
+            beams = self.detect_beams(image_no_staff)
+            self.associate_beams_with_notes(note_heads, beams)
 
-        # Detect accidentals
-        accidentals = self.detect_accidentals(image_no_staff, binary_image)
+            # Detect accidentals
+            accidentals = self.detect_accidentals(image_no_staff, binary_image)
 
-        # Apply accidentals to notes
-        self.apply_accidentals_to_notes(note_heads, accidentals)
+            # Apply accidentals to notes
+            self.apply_accidentals_to_notes(note_heads, accidentals)
 
-        # Detect rests
-        rests = self.detect_rests(image_no_staff)
+            # Detect rests
+            rests = self.detect_rests(image_no_staff)
+        finally:
+            self._shared_contours = None
 
         # Calculate pitches (after accidentals are applied)
-        for note_head in note_heads:
-            base_pitch = self.calculate_pitch(note_head, clef)
+        base_pitches = self.calculate_pitches(note_heads, clef)
+        for note_head, base_pitch in zip(note_heads, base_pitches):
 
             # Apply accidental if present
             if note_head.accidental != Accidental.NONE:
@@ -752,16 +908,23 @@ class SymbolDetector:
         self.symbols = note_heads + rests + accidentals
 
         # Sort by x position
-        self.symbols.sort(key=lambda s: s.x)
+        self.symbols.sort(key=_symbol_x)
 
-        print(f"Detected {len(note_heads)} notes, {len(rests)} rests, "
-              f"{len(accidentals)} accidentals, {len(beams)} beams")
+        logger.debug("Detected %d notes, %d rests, %d accidentals, %d beams",
+                     len(note_heads), len(rests), len(accidentals), len(beams))
 
-        for i, note in enumerate(note_heads[:10]):  # Show first 10
-            duration = note.note_duration.name if note.note_duration else "UNKNOWN"
-            accidental_str = f" {note.accidental.name}" if note.accidental != Accidental.NONE else ""
-            beam_str = f" (beamed)" if note.is_beamed else ""
-            print(f"  Note {i+1}: {note.pitch}{accidental_str} ({duration}){beam_str} at x={note.x}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, note in enumerate(note_heads[:10]):  # Show first 10
+                duration = note.note_duration.name if note.note_duration else "UNKNOWN"
+                accidental_str = f" {note.accidental.name}" if note.accidental != Accidental.NONE else ""
+                beam_str = " (beamed)" if note.is_beamed else ""
+                logger.debug("  Note %d: %s%s (%s)%s at x=%d",
+                             i + 1, note.pitch, accidental_str, duration, beam_str, note.x)
+
+        # Applied last: detection above relies on image coordinates
+        if x_offset:
+            for symbol in self.symbols:
+                symbol.x += x_offset
 
         return self.symbols
 
@@ -776,27 +939,9 @@ class SymbolDetector:
         Returns:
             Modified pitch string
         """
-        if accidental == Accidental.NONE or accidental == Accidental.NATURAL:
-            return pitch
-
-        # Parse pitch
-        if len(pitch) < 2:
+        suffix = _ACCIDENTAL_SUFFIXES.get(accidental)
+        if suffix is None or len(pitch) < 2:
             return pitch
 
-        note = pitch[:-1]  # Everything except octave
-        octave = pitch[-1]
-
-        # Remove existing accidentals
-        note_base = note[0]
-
-        # Apply new accidental
-        if accidental == Accidental.SHARP:
-            return f"{note_base}#{octave}"
-        elif accidental == Accidental.FLAT:
-            return f"{note_base}b{octave}"
-        elif accidental == Accidental.DOUBLE_SHARP:
-            return f"{note_base}##{ octave}"
-        elif accidental == Accidental.DOUBLE_FLAT:
-            return f"{note_base}bb{octave}"
-
-        return pitch
+        # Replace any existing accidental, keeping the letter and octave
+        return f"{pitch[0]}{suffix}{pitch[-1]}"
@@ -1,5 +1,6 @@
 """Utility functions for sheetmusic2midi"""
 
 from .pdf_handler import PDFHandler
+from .cache import PreprocessCache
 
-__all__ = ["PDFHandler"]
+__all__ = ["PDFHandler", "PreprocessCache"]
@@ -0,0 +1,190 @@
+"""On-disk cache of preprocessing results for repeated conversions"""
+
+import hashlib
+import json
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..core.staff_detector import Staff
+
+# Default location used by the command-line interface
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sheetmusic2midi")
+
+# Bump whenever preprocessing or staff detection output changes so stale
+# entries are never reused
+CACHE_FORMAT_VERSION = 2
+
+_SUFFIXES = ("_bin.npy", "_nostaff.npy", "_staves.json")
+
+
+def image_cache_key(image_path: str, preprocess_resize: Optional[int] = None,
+                    blur_kernel_size: int = 3, threshold_method: str = 'adaptive') -> str:
+    """
+    Hash an input image file together with the preprocessing settings
+
+    Args:
+        image_path: Path to the input image
+        preprocess_resize: Target height used by the image processor, if any
+        blur_kernel_size: Gaussian blur size used by the image processor
+        threshold_method: Binarization method used by the image processor
+
+    Returns:
+        Hex digest identifying the image contents and settings
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(image_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    digest.update(f"|{CACHE_FORMAT_VERSION}|{preprocess_resize}|{blur_kernel_size}"
+                  f"|{threshold_method}".encode())
+    return digest.hexdigest()
+
+
+class PreprocessCache:
+    """
+    Content-addressed cache of binarized images, staff-free images and staves
+
+    Entries are keyed by a hash of the input file bytes and the preprocessing
+    settings. Each entry is three files; the staves JSON is written last and
+    marks the entry as complete. When the directory grows past max_bytes the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir: Directory holding cache entries (created if missing)
+            max_bytes: Total size above which old entries are evicted (default 1 GB)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, image_path: str, preprocess_resize: Optional[int] = None,
+                 blur_kernel_size: int = 3, threshold_method: str = 'adaptive') -> str:
+        """
+        Build the cache key for an input image
+
+        Args:
+            image_path: Path to the input image
+            preprocess_resize: Target height used by the image processor, if any
+            blur_kernel_size: Gaussian blur size used by the image processor
+            threshold_method: Binarization method used by the image processor
+
+        Returns:
+            Hex digest identifying the image contents and settings
+        """
+        return image_cache_key(image_path, preprocess_resize, blur_kernel_size,
+                               threshold_method)
+
+    def load(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray, List[Staff], int]]:
+        """
+        Load a cached entry
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Tuple of (binary image, image without staff lines, staves,
+            line thickness) with the images memory-mapped read-only,
+            or None if the entry is missing or unreadable
+        """
+        paths = self._paths(key)
+        try:
+            with open(paths[2], 'r', encoding='utf-8') as f:
+                staff_data = json.load(f)
+            binary_image = np.load(paths[0], mmap_mode='r')
+            image_no_staff = np.load(paths[1], mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+        # Mark the entry as recently used
+        for path in paths:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+        staves = [Staff(**staff) for staff in staff_data['staves']]
+        return binary_image, image_no_staff, staves, staff_data['line_thickness']
+
+    def store(self, key: str, binary_image: np.ndarray, image_no_staff: np.ndarray,
+              staves: List[Staff], line_thickness: int) -> None:
+        """
+        Store preprocessing results, then evict old entries if over the size cap
+
+        Args:
+            key: Cache key from make_key
+            binary_image: Preprocessed binary image
+            image_no_staff: Binary image with staff lines removed
+            staves: Detected staves
+            line_thickness: Estimated staff line thickness
+        """
+        bin_path, no_staff_path, staves_path = self._paths(key)
+        staff_data = {
+            'staves': [
+                {
+                    'lines': [int(y) for y in staff.lines],
+                    'line_spacing': float(staff.line_spacing),
+                    'x_start': int(staff.x_start),
+                    'x_end': int(staff.x_end),
+                }
+                for staff in staves
+            ],
+            'line_thickness': int(line_thickness),
+        }
+
+        try:
+            self._atomic_save_array(bin_path, binary_image)
+            self._atomic_save_array(no_staff_path, image_no_staff)
+            tmp_path = f"{staves_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(staff_data, f)
+            os.replace(tmp_path, staves_path)
+        except OSError as e:
+            print(f"Warning: Could not write preprocessing cache entry: {e}")
+            return
+
+        self._evict()
+
+    def _paths(self, key: str) -> Tuple[str, str, str]:
+        """File paths of the three parts of a cache entry"""
+        return tuple(os.path.join(self.cache_dir, key + suffix) for suffix in _SUFFIXES)
+
+    @staticmethod
+    def _atomic_save_array(path: str, array: np.ndarray) -> None:
+        """Write an array to a temporary file and rename it into place"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries = {}
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                suffix = next((s for s in _SUFFIXES if entry.name.endswith(s)), None)
+                if suffix is None or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                key = entry.name[:-len(suffix)]
+                size, mtime = entries.get(key, (0, 0.0))
+                entries[key] = (size + stat.st_size, max(mtime, stat.st_mtime))
+                total += stat.st_size
+
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
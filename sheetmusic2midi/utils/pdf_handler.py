@@ -1,14 +1,299 @@
 """PDF handling utilities for sheet music conversion"""
 
+import hashlib
+import importlib.util
+import logging
 import os
+import shutil
 import tempfile
-from typing import List, Optional
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterator, List, Optional
 
-try:
-    from pdf2image import convert_from_path
-    PDF_SUPPORT = True
-except ImportError:
-    PDF_SUPPORT = False
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# PyMuPDF takes tens of milliseconds to import, so only check that it is
+# installed here and import it when a PDF is actually opened
+PDF_SUPPORT = importlib.util.find_spec("pymupdf") is not None
+
+# Documents shorter than this are rendered in-process; below it, starting
+# worker processes costs more than it saves
+_MIN_PARALLEL_PAGES = 8
+
+# Pages rendered ahead of the background PNG writer before rendering waits
+_MAX_PENDING_WRITES = 2
+
+# Name prefix of the page directories created by pdf_to_images
+_TEMP_DIR_PREFIX = "sheetmusic2midi_"
+
+# Name suffix of page cache entries, which cleanup_temp_images leaves alone
+_PAGE_CACHE_SUFFIX = ".pages"
+
+# Number of rendered documents a page cache directory keeps
+_PAGE_CACHE_MAX_ENTRIES = 8
+
+# RAM-backed filesystem for page images that are deleted after conversion
+_SHARED_MEMORY_DIR = "/dev/shm"
+
+# Page directories created by _make_temp_dir that cleanup_temp_images may
+# remove as a whole; any other directory only has the listed files removed
+_created_temp_dirs = set()
+_created_temp_dirs_lock = threading.Lock()
+
+_MISSING_PDF_SUPPORT = (
+    "PDF support requires the PyMuPDF library. "
+    "Install it with: pip install PyMuPDF"
+)
+
+
+def _open_pdf(pdf_path: str):
+    """
+    Open a PDF document with PyMuPDF
+
+    Args:
+        pdf_path: Path to PDF file
+
+    Returns:
+        The opened pymupdf.Document; the caller closes it
+
+    Raises:
+        ImportError: If PyMuPDF is not installed
+        FileNotFoundError: If PDF file doesn't exist
+        ValueError: If the PDF file is empty
+        RuntimeError: If the file cannot be opened as a PDF
+    """
+    if not PDF_SUPPORT:
+        raise ImportError(_MISSING_PDF_SUPPORT)
+
+    try:
+        file_size = os.stat(pdf_path).st_size
+    except FileNotFoundError:
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+    if file_size == 0:
+        raise ValueError(f"PDF file is empty: {pdf_path}")
+
+    import pymupdf
+    try:
+        return pymupdf.open(pdf_path)
+    except Exception as e:
+        raise RuntimeError(f"Failed to open PDF: {e}")
+
+
+def _colorspace(grayscale: bool):
+    """PyMuPDF colorspace for rendering grayscale or RGB pages"""
+    import pymupdf
+    return pymupdf.csGRAY if grayscale else pymupdf.csRGB
+
+
+def _pixmap_to_array(pixmap, grayscale: bool) -> np.ndarray:
+    """
+    View a rendered page as a numpy array
+
+    Args:
+        pixmap: PyMuPDF pixmap rendered with _colorspace(grayscale)
+        grayscale: Whether the pixmap is single-channel
+
+    Returns:
+        2-D grayscale array, or a BGR array for colour pages
+    """
+    pixels = np.frombuffer(pixmap.samples, dtype=np.uint8)
+    if grayscale:
+        return pixels.reshape(pixmap.height, pixmap.width)
+    rgb = pixels.reshape(pixmap.height, pixmap.width, pixmap.n)
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+def _make_temp_dir() -> str:
+    """
+    Create a directory for rendered page images
+
+    Uses /dev/shm when it exists and is writable, so the pages never touch
+    the disk; they take RAM until cleaned up instead (about 1-2 MB per
+    grayscale page at 300 DPI). Falls back to the system temp directory.
+
+    Returns:
+        Path of the new directory
+    """
+    temp_dir = None
+    if os.path.isdir(_SHARED_MEMORY_DIR) and os.access(_SHARED_MEMORY_DIR, os.W_OK):
+        try:
+            temp_dir = tempfile.mkdtemp(prefix=_TEMP_DIR_PREFIX, dir=_SHARED_MEMORY_DIR)
+        except OSError:
+            pass
+    if temp_dir is None:
+        temp_dir = tempfile.mkdtemp(prefix=_TEMP_DIR_PREFIX)
+    with _created_temp_dirs_lock:
+        _created_temp_dirs.add(temp_dir)
+    return temp_dir
+
+
+def _page_file_name(page_num: int) -> str:
+    """File name of a rendered page, e.g. page_001.png"""
+    return f"page_{page_num:03d}.png"
+
+
+def _page_cache_key(pdf_path: str, dpi: int, grayscale: bool) -> str:
+    """
+    Hash a PDF file together with its rendering settings
+
+    Args:
+        pdf_path: Path to PDF file
+        dpi: Resolution for image conversion
+        grayscale: Whether pages are rendered single-channel
+
+    Returns:
+        Hex digest identifying the PDF contents and settings
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    digest.update(f"|{dpi}|{int(grayscale)}".encode())
+    return digest.hexdigest()
+
+
+def _cached_pages(entry_dir: str, num_pages: int) -> Optional[List[str]]:
+    """
+    Page files of a complete page cache entry
+
+    Args:
+        entry_dir: Cache entry directory
+        num_pages: Number of pages the document has
+
+    Returns:
+        Paths of the cached pages in page order, or None on a cache miss
+    """
+    try:
+        stored = set(os.listdir(entry_dir))
+    except OSError:
+        return None
+    names = [_page_file_name(page_num) for page_num in range(1, num_pages + 1)]
+    if not stored.issuperset(names):
+        return None
+
+    # Mark the entry as recently used
+    try:
+        os.utime(entry_dir)
+    except OSError:
+        pass
+    return [os.path.join(entry_dir, name) for name in names]
+
+
+def _store_cached_pages(temp_dir: str, entry_dir: str, image_paths: List[str],
+                        num_pages: int) -> Optional[List[str]]:
+    """
+    Move freshly rendered pages into place as a page cache entry
+
+    If a complete entry already exists, because another conversion stored
+    the same document first, it is used and the fresh pages are deleted.
+    An incomplete entry, e.g. one trimmed by a concurrent eviction, is
+    replaced.
+
+    Args:
+        temp_dir: Directory holding the rendered pages
+        entry_dir: Cache entry directory
+        image_paths: Paths of the rendered pages in temp_dir
+        num_pages: Number of pages the document has
+
+    Returns:
+        Paths of the pages in the entry, or None if the entry could not be
+        stored, in which case the rendered pages are left in temp_dir
+    """
+    for _ in range(2):
+        try:
+            os.rename(temp_dir, entry_dir)
+        except OSError:
+            cached = _cached_pages(entry_dir, num_pages)
+            if cached is not None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                return cached
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        else:
+            return [os.path.join(entry_dir, os.path.basename(path)) for path in image_paths]
+    logger.warning("Could not store rendered pages in cache entry %s", entry_dir)
+    return None
+
+
+def _evict_page_cache(cache_dir: str) -> None:
+    """Delete least recently used page cache entries beyond the entry limit"""
+    with os.scandir(cache_dir) as it:
+        entries = [entry for entry in it
+                   if entry.name.endswith(_PAGE_CACHE_SUFFIX) and entry.is_dir()]
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[_PAGE_CACHE_MAX_ENTRIES:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def _write_png(image_path: str, image: np.ndarray) -> None:
+    """
+    Write a rendered page as PNG
+
+    OpenCV's default PNG settings (fastest zlib level, run-length strategy)
+    suit mostly blank pages and encode about twice as fast as PyMuPDF's own
+    writer.
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    if not cv2.imwrite(image_path, image):
+        raise OSError(f"Could not write {image_path}")
+
+
+def _render_pages(pdf_path: str, first_page: int, last_page: int, num_pages: int,
+                  dpi: int, temp_dir: str, grayscale: bool) -> List[str]:
+    """
+    Render a range of PDF pages to PNG files
+
+    Module-level so worker processes can run it; each call opens its own
+    document. PNG encoding releases the GIL, so on multi-core machines
+    pages are written by a background thread while the next page renders.
+
+    Args:
+        pdf_path: Path to PDF file
+        first_page: First page to render (1-based)
+        last_page: Last page to render (inclusive)
+        num_pages: Total pages in the document, for progress messages
+        dpi: Resolution for image conversion
+        temp_dir: Directory the page_NNN.png files are written to
+        grayscale: Render single-channel pages
+
+    Returns:
+        Paths of the written files, in page order
+    """
+    doc = _open_pdf(pdf_path)
+
+    image_paths = []
+    try:
+        # Encoding takes a fraction of the render time, so one writer keeps
+        # up; bounding the pending writes caps how many pages are in memory.
+        # On a single core the thread would only add switching overhead.
+        background = (os.cpu_count() or 1) > 1
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending = deque()
+            for page_num in range(first_page, last_page + 1):
+                image_path = os.path.join(temp_dir, _page_file_name(page_num))
+                pixmap = doc[page_num - 1].get_pixmap(dpi=dpi,
+                                                      colorspace=_colorspace(grayscale))
+                image = _pixmap_to_array(pixmap, grayscale)
+                if background:
+                    pending.append(writer.submit(_write_png, image_path, image))
+                    if len(pending) > _MAX_PENDING_WRITES:
+                        pending.popleft().result()
+                else:
+                    _write_png(image_path, image)
+                image_paths.append(image_path)
+                logger.debug("Extracted page %d/%d", page_num, num_pages)
+
+            for future in pending:
+                future.result()
+    finally:
+        doc.close()
+
+    return image_paths
 
 
 class PDFHandler:
@@ -20,85 +305,196 @@ class PDFHandler:
         Check if PDF support is available
 
         Returns:
-            True if pdf2image is installed, False otherwise
+            True if PyMuPDF is installed, False otherwise
         """
         return PDF_SUPPORT
 
     @staticmethod
-    def pdf_to_images(pdf_path: str, dpi: int = 300, temp_dir: Optional[str] = None) -> List[str]:
+    def pdf_to_images(pdf_path: str, dpi: int = 300, temp_dir: Optional[str] = None,
+                      grayscale: bool = True, jobs: Optional[int] = None,
+                      cache_dir: Optional[str] = None) -> List[str]:
         """
         Convert PDF pages to image files
 
+        Pages are independent, so documents of 8 or more pages are split into
+        contiguous page ranges rendered by parallel worker processes.
+
+        With a cache_dir, rendered pages are kept in an entry keyed by a hash
+        of the PDF contents, dpi and grayscale, and converting the same PDF
+        again returns the stored files without rendering. The 8 most recently
+        used entries are kept.
+
         Args:
             pdf_path: Path to PDF file
             dpi: Resolution for image conversion (default 300 DPI for good quality)
-            temp_dir: Directory for temporary image files (default: system temp)
+            temp_dir: Directory for temporary image files (default: a new
+                     directory in /dev/shm where available, else system temp)
+            grayscale: Render single-channel pages, a third of the size of
+                      RGB ones (False keeps colour); ImageProcessor.load_image
+                      reads them as grayscale either way
+            jobs: Number of worker processes (default: os.cpu_count()).
+                  With 1, pages are rendered sequentially in this process.
+            cache_dir: Directory holding cached pages (default: no caching).
+                      When set, temp_dir is ignored and cleanup_temp_images
+                      leaves the returned files in place, unless the pages
+                      could not be stored in the cache.
 
         Returns:
             List of paths to generated image files (one per page)
 
         Raises:
-            ImportError: If pdf2image is not installed
+            ImportError: If PyMuPDF is not installed
             FileNotFoundError: If PDF file doesn't exist
+            ValueError: If the PDF file is empty
         """
-        if not PDF_SUPPORT:
-            raise ImportError(
-                "PDF support requires pdf2image library. "
-                "Install it with: pip install pdf2image"
-            )
+        num_pages = PDFHandler.get_page_count(pdf_path)
 
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+        entry_dir = None
+        if cache_dir is not None:
+            entry_dir = os.path.join(
+                cache_dir, _page_cache_key(pdf_path, dpi, grayscale) + _PAGE_CACHE_SUFFIX
+            )
+            cached = _cached_pages(entry_dir, num_pages)
+            if cached is not None:
+                logger.info("Reusing %d cached page(s) from %s", num_pages, entry_dir)
+                return cached
 
-        # Create temporary directory if not specified
-        if temp_dir is None:
-            temp_dir = tempfile.mkdtemp(prefix="sheetmusic2midi_")
+            # Rendered next to the entry, then renamed into place when complete
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_dir = tempfile.mkdtemp(prefix=_TEMP_DIR_PREFIX, dir=cache_dir)
+        elif temp_dir is None:
+            # Create temporary directory if not specified
+            temp_dir = _make_temp_dir()
 
-        print(f"Converting PDF to images (DPI: {dpi})...")
+        logger.info("Converting PDF to images (DPI: %d)...", dpi)
 
-        # Convert PDF pages to images
+        workers = min(jobs or os.cpu_count() or 1, num_pages)
         try:
-            images = convert_from_path(
-                pdf_path,
-                dpi=dpi,
-                output_folder=temp_dir,
-                fmt='png'
-            )
+            if workers <= 1 or num_pages < _MIN_PARALLEL_PAGES:
+                image_paths = _render_pages(pdf_path, 1, num_pages, num_pages,
+                                            dpi, temp_dir, grayscale)
+            else:
+                pages_per_worker = -(-num_pages // workers)
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [
+                        executor.submit(_render_pages, pdf_path, first_page,
+                                        min(first_page + pages_per_worker - 1, num_pages),
+                                        num_pages, dpi, temp_dir, grayscale)
+                        for first_page in range(1, num_pages + 1, pages_per_worker)
+                    ]
+                    image_paths = [path for future in futures for path in future.result()]
         except Exception as e:
+            if entry_dir is not None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
             raise RuntimeError(f"Failed to convert PDF: {e}")
 
-        # Save images and collect paths
-        image_paths = []
-        for i, image in enumerate(images, 1):
-            image_path = os.path.join(temp_dir, f"page_{i:03d}.png")
-            image.save(image_path, 'PNG')
-            image_paths.append(image_path)
-            print(f"  Extracted page {i}/{len(images)}")
+        logger.info("Extracted %d page(s) from PDF", len(image_paths))
 
-        print(f"Successfully extracted {len(image_paths)} page(s) from PDF")
+        if entry_dir is not None:
+            stored = _store_cached_pages(temp_dir, entry_dir, image_paths, num_pages)
+            if stored is not None:
+                image_paths = stored
+                _evict_page_cache(cache_dir)
 
         return image_paths
 
+    @staticmethod
+    def get_page_count(pdf_path: str) -> int:
+        """
+        Get the number of pages in a PDF
+
+        Args:
+            pdf_path: Path to PDF file
+
+        Returns:
+            Number of pages
+
+        Raises:
+            ImportError: If PyMuPDF is not installed
+            FileNotFoundError: If PDF file doesn't exist
+            ValueError: If the PDF file is empty
+        """
+        doc = _open_pdf(pdf_path)
+        try:
+            return doc.page_count
+        finally:
+            doc.close()
+
+    @staticmethod
+    def iter_pdf_pages(pdf_path: str, dpi: int = 300,
+                       grayscale: bool = True) -> Iterator[np.ndarray]:
+        """
+        Render PDF pages one at a time
+
+        Only the page being rendered is held in memory, so long documents can
+        be streamed into the conversion pipeline.
+
+        Args:
+            pdf_path: Path to PDF file
+            dpi: Resolution for image conversion (default 300 DPI for good quality)
+            grayscale: Render single-channel pages, which is all preprocessing
+                      uses (False yields BGR colour pages)
+
+        Yields:
+            Each page as a grayscale (or BGR) numpy array, in page order
+
+        Raises:
+            ImportError: If PyMuPDF is not installed
+            FileNotFoundError: If PDF file doesn't exist
+            ValueError: If the PDF file is empty
+            RuntimeError: If a page cannot be rendered
+        """
+        doc = _open_pdf(pdf_path)
+
+        try:
+            for page_num, page in enumerate(doc, 1):
+                try:
+                    pixmap = page.get_pixmap(dpi=dpi, colorspace=_colorspace(grayscale))
+                except Exception as e:
+                    raise RuntimeError(f"Failed to convert PDF page {page_num}: {e}")
+
+                logger.debug("Extracted page %d/%d", page_num, doc.page_count)
+                yield _pixmap_to_array(pixmap, grayscale)
+        finally:
+            doc.close()
+
     @staticmethod
     def cleanup_temp_images(image_paths: List[str]) -> None:
         """
         Clean up temporary image files
 
+        When the files are the contents of a page directory that
+        pdf_to_images created itself, the whole directory is removed in one
+        call; in a caller-supplied temp_dir only the listed files are deleted.
+        Pages returned from a pdf_to_images cache_dir are left in place.
+
         Args:
             image_paths: List of image file paths to delete
         """
+        if not image_paths:
+            return
+
+        temp_dir = os.path.dirname(image_paths[0])
+        if temp_dir.endswith(_PAGE_CACHE_SUFFIX):
+            return
+        if all(os.path.dirname(path) == temp_dir for path in image_paths):
+            with _created_temp_dirs_lock:
+                created = temp_dir in _created_temp_dirs
+                _created_temp_dirs.discard(temp_dir)
+            if created:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                return
+
         for path in image_paths:
             try:
                 if os.path.exists(path):
                     os.remove(path)
             except Exception as e:
-                print(f"Warning: Could not delete temporary file {path}: {e}")
+                logger.warning("Could not delete temporary file %s: %s", path, e)
 
         # Try to remove the directory if empty
-        if image_paths:
-            try:
-                temp_dir = os.path.dirname(image_paths[0])
-                if os.path.exists(temp_dir) and not os.listdir(temp_dir):
-                    os.rmdir(temp_dir)
-            except Exception:
-                pass  # Ignore errors during cleanup
+        try:
+            if os.path.exists(temp_dir) and not os.listdir(temp_dir):
+                os.rmdir(temp_dir)
+        except Exception:
+            pass  # Ignore errors during cleanup
@@ -2,17 +2,51 @@
 
 import unittest
 import os
+import shutil
+import sys
 import tempfile
+import types
+from unittest import mock
+import cv2
+import numpy as np
 from sheetmusic2midi import SheetMusicConverter
+from sheetmusic2midi.core import (
+    Accidental, ImageProcessor, KeySignature, MidiGenerator, StaffDetector,
+    SymbolDetector, TimeSignature
+)
+from sheetmusic2midi.core.staff_detector import Staff
+from sheetmusic2midi.core.symbol_detector import MusicalSymbol, SymbolType
+from sheetmusic2midi.utils import pdf_handler
+from sheetmusic2midi.utils.pdf_handler import PDFHandler
+
+
+# (note name, MIDI number) pairs checked by MidiGenerator.note_name_to_midi
+NOTE_NAME_CASES = (
+    # Natural notes
+    ('C4', 60), ('D4', 62), ('A4', 69), ('C5', 72), ('B8', 119),
+    # Sharps
+    ('C#4', 61), ('F#4', 66),
+    # Flats
+    ('Bb4', 70), ('Eb4', 63),
+    # Double accidentals
+    ('C##4', 62),  # D4
+    ('Dbb4', 60),  # C4
+)
 
 
 class TestSheetMusicConverter(unittest.TestCase):
     """Test cases for the main converter"""
 
-    def setUp(self):
-        """Set up test fixtures"""
-        self.converter = SheetMusicConverter(tempo=120, clef='treble')
-        self.temp_dir = tempfile.mkdtemp()
+    @classmethod
+    def setUpClass(cls):
+        """Set up fixtures shared by all tests in this class"""
+        cls.converter = SheetMusicConverter(tempo=120, clef='treble')
+        cls.temp_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the shared temporary directory"""
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
 
     def test_converter_initialization(self):
         """Test converter initializes correctly"""
@@ -32,34 +66,218 @@ class TestSheetMusicConverter(unittest.TestCase):
         self.assertIn('tempo', info)
         self.assertIn('clef', info)
 
+    def test_convert_ndarray(self):
+        """Test conversion of an in-memory image"""
+        image = np.full((200, 400), 255, dtype=np.uint8)
+        for y in range(60, 160, 20):
+            image[y-1:y+2, 20:380] = 0
+
+        output_path = os.path.join(self.temp_dir, 'ndarray.mid')
+        result = self.converter.convert_ndarray(image, output_path)
+        self.assertEqual(result, output_path)
+        self.assertTrue(os.path.exists(output_path))
+
+    def test_convert_uses_cache(self):
+        """Test that a second conversion of the same image reuses cached results"""
+        image = np.full((200, 400), 255, dtype=np.uint8)
+        for y in range(60, 160, 20):
+            image[y-1:y+2, 20:380] = 0
+        input_path = os.path.join(self.temp_dir, 'cached.png')
+        cv2.imwrite(input_path, image)
+
+        cache_dir = os.path.join(self.temp_dir, 'cache')
+        first = SheetMusicConverter(cache_dir=cache_dir)
+        first.convert(input_path, os.path.join(self.temp_dir, 'first.mid'))
+
+        key = first.preprocess_cache.make_key(input_path)
+        self.assertIsNotNone(first.preprocess_cache.load(key))
+
+        # A fresh converter can only get the results from the disk cache
+        SheetMusicConverter._results.clear()
+        second = SheetMusicConverter(cache_dir=cache_dir)
+        with mock.patch.object(second.image_processor, 'full_preprocessing_pipeline',
+                               side_effect=AssertionError('preprocessing ran again')):
+            second.convert(input_path, os.path.join(self.temp_dir, 'second.mid'))
+        self.assertTrue(np.array_equal(second.binary_image, first.binary_image))
+        self.assertTrue(np.array_equal(second.image_no_staff, first.image_no_staff))
+        self.assertEqual(second.staff_detector.staves, first.staff_detector.staves)
+
+    def test_batch_convert_parallel(self):
+        """Test batch conversion with worker processes"""
+        input_dir = os.path.join(self.temp_dir, 'input')
+        output_dir = os.path.join(self.temp_dir, 'output')
+        os.makedirs(input_dir)
+        image = np.full((200, 400), 255, dtype=np.uint8)
+        for name in ('page1.png', 'page2.png'):
+            cv2.imwrite(os.path.join(input_dir, name), image)
+
+        output_files = self.converter.batch_convert(input_dir, output_dir, jobs=2)
+        self.assertEqual(
+            sorted(os.path.basename(path) for path in output_files),
+            ['page1.mid', 'page2.mid']
+        )
+
+    def test_convert_multipage_missing_page_raises(self):
+        """Test a failing page stops the multipage pipeline with its error"""
+        page_path = os.path.join(self.temp_dir, 'page1.png')
+        cv2.imwrite(page_path, np.full((200, 400), 255, dtype=np.uint8))
+        missing_path = os.path.join(self.temp_dir, 'missing.png')
+
+        with self.assertRaises(ValueError):
+            self.converter.convert_multipage(
+                [page_path, missing_path, page_path],
+                os.path.join(self.temp_dir, 'multipage.mid')
+            )
+
+
+class _StubPage:
+    """Blank PDF page standing in for a pymupdf.Page"""
+
+    def get_pixmap(self, dpi, colorspace):
+        return types.SimpleNamespace(samples=bytes(20 * 10), width=20, height=10, n=1)
+
+
+class _StubDocument:
+    """Document standing in for a pymupdf.Document"""
+
+    def __init__(self, page_count):
+        self.page_count = page_count
+
+    def __getitem__(self, index):
+        return _StubPage()
+
+    def close(self):
+        pass
+
+
+class TestPDFHandler(unittest.TestCase):
+    """Test cases for PDFHandler, with PyMuPDF replaced by a stub"""
+
+    def setUp(self):
+        """Install a stub pymupdf module that opens 3-page documents"""
+        self.open_calls = 0
+
+        def open_pdf(path):
+            self.open_calls += 1
+            return _StubDocument(3)
+
+        stub = types.SimpleNamespace(open=open_pdf, csGRAY='gray', csRGB='rgb')
+        for patcher in (mock.patch.dict(sys.modules, {'pymupdf': stub}),
+                        mock.patch.object(pdf_handler, 'PDF_SUPPORT', True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.pdf_path = os.path.join(self.temp_dir, 'score.pdf')
+        with open(self.pdf_path, 'wb') as f:
+            f.write(b'%PDF-1.4 stub')
+        self.cache_dir = os.path.join(self.temp_dir, 'cache')
+
+    def _pdf_to_images(self):
+        """Render the stub PDF through the page cache"""
+        return PDFHandler.pdf_to_images(self.pdf_path, jobs=1, cache_dir=self.cache_dir)
+
+    def test_page_cache_hit(self):
+        """Test a second conversion returns the cached pages without rendering"""
+        first = self._pdf_to_images()
+        self.assertEqual([os.path.basename(path) for path in first],
+                         ['page_001.png', 'page_002.png', 'page_003.png'])
+        opened = self.open_calls
+
+        second = self._pdf_to_images()
+        self.assertEqual(second, first)
+        # Only the page count is read; no page is rendered again
+        self.assertEqual(self.open_calls, opened + 1)
+
+    def test_page_cache_incomplete_entry_is_replaced(self):
+        """Test pages missing from a cache entry are rendered and stored again"""
+        first = self._pdf_to_images()
+        os.remove(first[2])
+
+        second = self._pdf_to_images()
+        self.assertEqual(second, first)
+        self.assertTrue(all(os.path.exists(path) for path in second))
+        entry_dir = os.path.dirname(first[0])
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(entry_dir)])
+
+    def test_convert_pdf_missing_file_raises_runtime_error(self):
+        """Test convert_pdf reports a missing PDF as an extraction failure"""
+        converter = SheetMusicConverter()
+        with self.assertRaises(RuntimeError):
+            converter.convert_pdf(os.path.join(self.temp_dir, 'missing.pdf'),
+                                  os.path.join(self.temp_dir, 'missing.mid'))
+
+    def test_convert_pdf_page_render_error_raises_runtime_error(self):
+        """Test a page that fails to render surfaces as an extraction failure"""
+        converter = SheetMusicConverter()
+        with mock.patch.object(_StubPage, 'get_pixmap', side_effect=OSError('bad page')):
+            with self.assertRaises(RuntimeError):
+                converter.convert_pdf(self.pdf_path, os.path.join(self.temp_dir, 'score.mid'))
+
+    def test_convert_pdf_cleanup_temp_is_deprecated(self):
+        """Test passing cleanup_temp warns that it is ignored"""
+        converter = SheetMusicConverter()
+        with self.assertWarns(DeprecationWarning):
+            converter.convert_pdf(self.pdf_path, os.path.join(self.temp_dir, 'score.mid'),
+                                  cleanup_temp=True)
+
 
 class TestImageProcessor(unittest.TestCase):
     """Test cases for ImageProcessor"""
 
     def test_image_processor_initialization(self):
         """Test image processor initializes"""
-        from sheetmusic2midi.core import ImageProcessor
         processor = ImageProcessor()
         self.assertIsNone(processor.original_image)
         self.assertIsNone(processor.processed_image)
 
+    def test_apply_to_images(self):
+        """Test parallel preprocessing keeps input order"""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        paths = []
+        for width in (300, 400, 500):
+            path = os.path.join(temp_dir, f'{width}.png')
+            cv2.imwrite(path, np.full((100, width), 255, dtype=np.uint8))
+            paths.append(path)
+
+        results = ImageProcessor().apply_to_images(paths, max_workers=2)
+        self.assertEqual([image.shape[1] for image in results], [300, 400, 500])
+
 
 class TestStaffDetector(unittest.TestCase):
     """Test cases for StaffDetector"""
 
     def test_staff_detector_initialization(self):
         """Test staff detector initializes"""
-        from sheetmusic2midi.core import StaffDetector
         detector = StaffDetector()
         self.assertEqual(len(detector.staves), 0)
 
+    def test_get_staff_positions(self):
+        """Test batch staff positions match single lookups"""
+        detector = StaffDetector()
+        detector.staves = [
+            Staff(lines=[20, 30, 40, 50, 60], line_spacing=10.0, x_start=0, x_end=100),
+            Staff(lines=[100, 110, 120, 130, 140], line_spacing=10.0, x_start=0, x_end=100),
+        ]
+        ys = [10, 20, 45, 60, 80, 125]
+
+        indices, positions = detector.get_staff_positions(ys)
+        for y, index, position in zip(ys, indices, positions):
+            staff, expected = detector.get_staff_position(y)
+            if staff is None:
+                self.assertEqual(index, -1)
+            else:
+                self.assertIs(detector.staves[index], staff)
+                self.assertEqual(position, expected)
+
 
 class TestSymbolDetector(unittest.TestCase):
     """Test cases for SymbolDetector"""
 
     def test_symbol_detector_initialization(self):
         """Test symbol detector initializes"""
-        from sheetmusic2midi.core import SymbolDetector
         detector = SymbolDetector()
         self.assertEqual(len(detector.symbols), 0)
         self.assertEqual(len(detector.accidentals), 0)
@@ -69,7 +287,6 @@ class TestSymbolDetector(unittest.TestCase):
 
     def test_time_signature(self):
         """Test time signature class"""
-        from sheetmusic2midi.core import TimeSignature
         ts = TimeSignature(3, 4)
         self.assertEqual(ts.numerator, 3)
         self.assertEqual(ts.denominator, 4)
@@ -77,14 +294,26 @@ class TestSymbolDetector(unittest.TestCase):
 
     def test_key_signature(self):
         """Test key signature class"""
-        from sheetmusic2midi.core import KeySignature
         ks = KeySignature(sharps=2)
         self.assertEqual(ks.sharps, 2)
         self.assertEqual(ks.flats, 0)
 
+    def test_key_signature_accidentals_not_applied_to_notes(self):
+        """Test key signature accidentals leave the following note unchanged"""
+        detector = SymbolDetector()
+        note = MusicalSymbol(SymbolType.NOTE_HEAD, x=50, y=40, width=10, height=8)
+        key_sharp = MusicalSymbol(SymbolType.SHARP, x=35, y=36, width=5, height=14,
+                                  accidental=Accidental.SHARP, in_key_signature=True)
+
+        detector.apply_accidentals_to_notes([note], [key_sharp])
+        self.assertEqual(note.accidental, Accidental.NONE)
+
+        key_sharp.in_key_signature = False
+        detector.apply_accidentals_to_notes([note], [key_sharp])
+        self.assertEqual(note.accidental, Accidental.SHARP)
+
     def test_accidental_enum(self):
         """Test accidental enumeration"""
-        from sheetmusic2midi.core import Accidental
         self.assertEqual(Accidental.SHARP.value, 1)
         self.assertEqual(Accidental.FLAT.value, -1)
         self.assertEqual(Accidental.NATURAL.value, 0)
@@ -95,35 +324,18 @@ class TestMidiGenerator(unittest.TestCase):
 
     def test_midi_generator_initialization(self):
         """Test MIDI generator initializes"""
-        from sheetmusic2midi.core import MidiGenerator
         generator = MidiGenerator(tempo=120)
         self.assertEqual(generator.tempo, 120)
 
     def test_note_name_to_midi(self):
         """Test note name to MIDI conversion"""
-        from sheetmusic2midi.core import MidiGenerator
         generator = MidiGenerator()
-
-        # Test natural notes
-        self.assertEqual(generator.note_name_to_midi('C4'), 60)
-        self.assertEqual(generator.note_name_to_midi('A4'), 69)
-        self.assertEqual(generator.note_name_to_midi('C5'), 72)
-
-        # Test sharps
-        self.assertEqual(generator.note_name_to_midi('C#4'), 61)
-        self.assertEqual(generator.note_name_to_midi('F#4'), 66)
-
-        # Test flats
-        self.assertEqual(generator.note_name_to_midi('Bb4'), 70)
-        self.assertEqual(generator.note_name_to_midi('Eb4'), 63)
-
-        # Test double accidentals
-        self.assertEqual(generator.note_name_to_midi('C##4'), 62)  # D4
-        self.assertEqual(generator.note_name_to_midi('Dbb4'), 60)  # C4
+        for name, expected in NOTE_NAME_CASES:
+            with self.subTest(note=name):
+                self.assertEqual(generator.note_name_to_midi(name), expected)
 
     def test_midi_generator_with_time_signature(self):
         """Test MIDI generator accepts time signature"""
-        from sheetmusic2midi.core import MidiGenerator, TimeSignature
         ts = TimeSignature(3, 4)
         generator = MidiGenerator(tempo=120, time_signature=ts)
         self.assertEqual(generator.time_signature.numerator, 3)